@@ -0,0 +1,141 @@
+import argparse
+import email.parser
+import email.policy
+import hashlib
+import json
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class Platform:
+    """In-memory state of the stand-in platform."""
+
+    def __init__(self, delay=0.0, batch=True):
+        self.delay = delay
+        self.batch = batch
+        self.lock = threading.Lock()
+        self.courses = {}
+        self.tasks = {}
+        self.requests = 0
+
+    def update_course(self, fields):
+        with self.lock:
+            self.courses[fields['name']] = fields
+        return 200
+
+    def update_task(self, fields, files):
+        for key in ('course_name', 'name', 'answer', 'difficulty'):
+            if not fields.get(key):
+                return 400
+        if 'info' not in files or 'writeup' not in files:
+            return 400
+        if 'files_sha256' in fields and hashlib.sha256(files.get('files', b'')).hexdigest() != fields['files_sha256']:
+            return 400
+        with self.lock:
+            if fields['course_name'] not in self.courses:
+                return 404
+            self.tasks[(fields['course_name'], fields['name'])] = {
+                'fields': fields,
+                'files': {name: len(data) for name, data in files.items()},
+            }
+        return 200
+
+
+def parse_multipart(content_type, body):
+    """Return form fields and files of a multipart/form-data body."""
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        f'Content-Type: {content_type}\r\n\r\n'.encode() + body
+    )
+    fields, files = {}, {}
+    for part in message.iter_parts():
+        name = part.get_param('name', header='content-disposition')
+        data = part.get_payload(decode=True)
+        if part.get_filename() is None:
+            fields[name] = data.decode()
+        else:
+            files[name] = data
+    return fields, files
+
+
+class Handler(BaseHTTPRequestHandler):
+    platform: Platform
+
+    def read_body(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            body = b''
+            while size := int(self.rfile.readline().split(b';')[0], 16):
+                body += self.rfile.read(size)
+                self.rfile.readline()
+            self.rfile.readline()
+            return body
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def reply(self, status, payload=None):
+        body = json.dumps(payload if payload is not None else {'status': status}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.reply(200 if self.path == '/api/v1/' else 404)
+
+    def do_POST(self):
+        platform = self.platform
+        with platform.lock:
+            platform.requests += 1
+        body = self.read_body()
+        time.sleep(platform.delay)
+        content_type = self.headers.get('Content-Type', '')
+
+        if self.path == '/api/v1/courses/update':
+            fields = dict(urllib.parse.parse_qsl(body.decode()))
+            self.reply(platform.update_course(fields))
+        elif self.path == '/api/v1/tasks/update':
+            fields, files = parse_multipart(content_type, body)
+            self.reply(platform.update_task(fields, files))
+        elif self.path == '/api/v1/tasks/batch_update' and platform.batch:
+            fields, files = parse_multipart(content_type, body)
+            results = []
+            for i, task in enumerate(json.loads(fields['tasks'])):
+                task_files = {
+                    name.rsplit('-', 1)[0]: data for name, data in files.items() if name.endswith(f'-{i}')
+                }
+                results.append({'name': task['name'], 'status': platform.update_task(task, task_files)})
+            self.reply(200, {'results': results})
+        else:
+            self.reply(404)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port=0, delay=0.0, batch=True):
+    """Start the stand-in platform in a background thread, return the server and its state."""
+    platform = Platform(delay, batch)
+    handler = type('PlatformHandler', (Handler,), {'platform': platform})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, platform
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the platform API used by upload.py')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--delay', type=float, default=0.0, help='seconds every POST takes')
+    parser.add_argument('--no-batch', action='store_true', help='answer tasks/batch_update with 404')
+    args = parser.parse_args()
+
+    server, platform = serve(args.port, args.delay, not args.no_batch)
+    print(f'Listening on http://127.0.0.1:{server.server_port}')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print(f'{platform.requests} requests, {len(platform.courses)} courses, {len(platform.tasks)} tasks')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,39 +1,156 @@
 import argparse
-import io
+import gzip
+import hashlib
+import json
+import os
 import requests
+import tempfile
+import threading
+import time
+import uuid
 import yaml
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-import glob
 import tarfile
-import os
+
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+CHUNK_SIZE = 64 * 1024
+# archives bigger than this go to a temporary file instead of memory
+SPOOL_SIZE = 1024 * 1024
+
+
+class UploadError(Exception):
+    """The platform could not be reached, or gave no usable answer, after all retries."""
+
+
+class MultipartStream:
+    """multipart/form-data body generated chunk by chunk instead of built in memory.
+
+    Can be iterated again, so requests resends it as is on retry.
+    """
+
+    def __init__(self):
+        self.boundary = uuid.uuid4().hex
+        self.parts = []
+
+    @property
+    def content_type(self):
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def field(self, name, value):
+        self.parts.append((self.__head(name), str(value).encode()))
+
+    def file(self, name, filename, content, content_type='application/octet-stream'):
+        # content is bytes, a path or a seekable binary file, files are read when the body is sent
+        self.parts.append((self.__head(name, filename, content_type), content))
+
+    def __head(self, name, filename=None, content_type=None):
+        head = f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"'
+        if filename is not None:
+            head += f'; filename="{filename}"'
+        if content_type is not None:
+            head += f'\r\nContent-Type: {content_type}'
+        return f'{head}\r\n\r\n'.encode()
+
+    def __len__(self):
+        size = len(f'--{self.boundary}--\r\n')
+        for head, content in self.parts:
+            size += len(head) + 2
+            if isinstance(content, bytes):
+                size += len(content)
+            elif hasattr(content, 'seek'):
+                size += content.seek(0, os.SEEK_END)
+            else:
+                size += os.path.getsize(content)
+        return size
+
+    @staticmethod
+    def __chunks(f):
+        while chunk := f.read(CHUNK_SIZE):
+            yield chunk
+
+    def __iter__(self):
+        for head, content in self.parts:
+            yield head
+            if isinstance(content, bytes):
+                yield content
+            elif hasattr(content, 'seek'):
+                content.seek(0)
+                yield from self.__chunks(content)
+            else:
+                with open(content, 'rb') as f:
+                    yield from self.__chunks(f)
+            yield b'\r\n'
+        yield f'--{self.boundary}--\r\n'.encode()
+
+
+def task_data(course_name, task_name, answer, difficulty, description='No description provided', points=10, files_sha256=None):
+    data = {
+        'course_name': course_name,
+        'name': task_name,
+        'description': description,
+        'answer': answer,
+        'difficulty': difficulty,
+        'points': points,
+    }
+    # sha256 of files.tar.gz, lets the platform and CDN skip an archive they already store
+    if files_sha256 is not None:
+        data['files_sha256'] = files_sha256
+    return data
 
 
 class MCTFapi:
-    def __init__(self, url, api_key):
+    def __init__(self, url, api_key, retries=3, backoff=1.0, timeout=(10, 60)):
         self.url = url
         self.api_key = api_key
+        self.retries = retries
+        self.backoff = backoff
+        # (connect, read) seconds, a platform that never answers counts as a failed attempt
+        self.timeout = timeout
+        # cleared after the platform answers tasks/batch_update with 404
+        self.batch_supported = True
 
-        self.session = requests.Session()
-        self.session.cookies.set('api_key', self.api_key)
+        # requests.Session is not thread safe, every worker gets its own
+        self._local = threading.local()
 
-        status = self.__ping()
+        try:
+            status = self.__ping()
+        except UploadError as e:
+            print(e)
+            exit(1)
         if status != 200:
             print(f'Bad ping response - {status}')
             exit(1)
 
+    @property
+    def session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.cookies.set('api_key', self.api_key)
+            self._local.session = session
+        return session
+
+    def __request(self, method, endpoint, **kwargs):
+        for attempt in range(self.retries + 1):
+            last = attempt == self.retries
+            try:
+                r = self.session.request(method, f'{self.url}/api/v1/{endpoint}', timeout=self.timeout, **kwargs)
+            except requests.RequestException as e:
+                if last:
+                    # raised in upload workers too, where exit() would abort main() before the manifest is saved
+                    raise UploadError(f'Couldnt connect to {self.url} or unhandled exception occured: {e}') from e
+            else:
+                if r.status_code not in RETRY_STATUSES or last:
+                    return r
+            time.sleep(self.backoff * 2 ** attempt)
+
     def __do_get(self, endpoint):
-        try:
-            return self.session.get(f'{self.url}/api/v1/{endpoint}')
-        except:
-            print(f'Couldnt connect to {self.url} or unhandled exception occured')
-            exit(1)
+        return self.__request('GET', endpoint)
 
-    def __do_post(self, endpoint, data=None, files=None):
-        try:
-            return self.session.post(f'{self.url}/api/v1/{endpoint}', data=data, files=files)
-        except:
-            print(f'Couldnt connect to {self.url} or unhandled exception occured')
-            exit(1)
+    def __do_post(self, endpoint, data=None, files=None, headers=None):
+        return self.__request('POST', endpoint, data=data, files=files, headers=headers)
 
     def __ping(self):
         r = self.__do_get('')
@@ -49,26 +166,224 @@ class MCTFapi:
 
         return self.__do_post('courses/update', data=data)
 
-    def update_task(self, course_name, task_name, answer, difficulty, info_path, writeup_path, attachments=None, description='No description provided', points=10):
-        data = {
-            'course_name': course_name,
-            'name': task_name,
-            'description': description,
-            'answer': answer,
-            'difficulty': difficulty,
-            'points': points,
-        }
+    def update_task(self, course_name, task_name, answer, difficulty, info_path, writeup_path, attachments=None, description='No description provided', points=10, files_sha256=None):
+        body = MultipartStream()
+        for key, value in task_data(course_name, task_name, answer, difficulty, description, points, files_sha256).items():
+            body.field(key, value)
+        body.file('info', 'info.md', info_path, 'text/markdown')
+        body.file('writeup', 'writeup.md', writeup_path, 'text/markdown')
+        if attachments is not None:
+            for attachment in attachments:
+                if attachment is not None:
+                    body.file('files', *attachment)
+
+        return self.__do_post('tasks/update', data=body, headers={'Content-Type': body.content_type})
+
+    def update_tasks(self, items):
+        """Send many update_task calls as one tasks/batch_update request.
+
+        items are dicts of update_task keyword arguments. The body has a
+        `tasks` field with a JSON list of task fields and info-N, writeup-N,
+        files-N parts for the N-th task. The platform answers with
+        {"results": [{"name": ..., "status": ...}, ...]} in the same order.
+        Returns one status code per item, falling back to update_task calls
+        if the platform has no batch endpoint. An answer that cannot be read
+        or does not have one result per item raises UploadError, which fails
+        every item of the batch.
+        """
+        if self.batch_supported:
+            body = MultipartStream()
+            body.field('tasks', json.dumps([
+                task_data(**{k: v for k, v in item.items() if k not in ('info_path', 'writeup_path', 'attachments')})
+                for item in items
+            ]))
+            for i, item in enumerate(items):
+                body.file(f'info-{i}', 'info.md', item['info_path'], 'text/markdown')
+                body.file(f'writeup-{i}', 'writeup.md', item['writeup_path'], 'text/markdown')
+                for attachment in item.get('attachments') or []:
+                    if attachment is not None:
+                        body.file(f'files-{i}', *attachment)
+
+            r = self.__do_post('tasks/batch_update', data=body, headers={'Content-Type': body.content_type})
+            if r.status_code in (404, 405):
+                print('Platform has no batch endpoint, updating tasks one by one')
+                self.batch_supported = False
+            elif r.status_code >= 400:
+                return [r.status_code] * len(items)
+            else:
+                try:
+                    statuses = [int(result['status']) for result in r.json()['results']]
+                except (ValueError, KeyError, TypeError) as e:
+                    raise UploadError(f'Unreadable tasks/batch_update answer: {e!r}') from e
+                if len(statuses) != len(items):
+                    raise UploadError(f'tasks/batch_update answered {len(statuses)} results for {len(items)} tasks')
+                return statuses
+
+        return [self.update_task(**item).status_code for item in items]
+
+
+def task_digest(course_name, task_yml, task_path, files_sha256):
+    # everything update_task sends for the task, public/ by the sha256 of its reproducible archive
+    h = hashlib.sha256()
+    fields = [
+        course_name,
+        task_yml['description']['name'],
+        task_yml['host-data']['flag'],
+        task_yml['description']['difficulty'],
+    ]
+    h.update(json.dumps(fields).encode())
+    for f in [task_path / 'DESCRIPTION.md', task_path / 'solve' / 'WRITEUP.md']:
+        data = f.read_bytes()
+        h.update(f'{len(data)}\0'.encode())
+        h.update(data)
+    h.update((files_sha256 or '').encode())
+    return h.hexdigest()
+
+
+class Manifest:
+    """Digests of tasks already uploaded to the platform, stored between runs."""
+
+    def __init__(self, path, url):
+        self.path = path
+        self.url = url
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        # digests are only meaningful for the platform they were uploaded to
+        self.tasks = data.get('tasks', {}) if data.get('url') == url else {}
+
+    def unchanged(self, key, digest):
+        return self.tasks.get(key) == digest
+
+    def update(self, key, digest):
+        self.tasks[key] = digest
+
+    def save(self):
+        tmp = self.path.with_suffix('.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({'url': self.url, 'tasks': self.tasks}, f, indent=2, sort_keys=True)
+        tmp.replace(self.path)
 
-        with open(info_path, 'rb') as info_file, open(writeup_path, 'rb') as writeup_file:
-            files = [
-                ('info', ('info.md', info_file, 'text/markdown')),
-                ('writeup', ('writeup.md', writeup_file, 'text/markdown')),
-            ]
-            if attachments is not None:
-                for i in attachments:
-                    files.append(('files', i))
 
-            return self.__do_post('tasks/update', data=data, files=files)
+def normalize_tarinfo(info):
+    # nothing that depends on the checkout may end up in the archive
+    info.mtime = 0
+    info.uid = info.gid = 0
+    info.uname = info.gname = ''
+    info.mode = 0o755 if info.isdir() or info.mode & 0o111 else 0o644
+    return info
+
+
+def write_archive(path, arcname, fileobj):
+    """Write path as a reproducible tar.gz: same files give the same bytes."""
+    with gzip.GzipFile(filename='', mode='wb', fileobj=fileobj, mtime=0) as gz:
+        with tarfile.open(fileobj=gz, mode='w', format=tarfile.PAX_FORMAT) as tar:
+            tar.add(path, arcname, recursive=False, filter=normalize_tarinfo)
+            for f in sorted(path.rglob('*')):
+                tar.add(f, f'{arcname}/{f.relative_to(path).as_posix()}', recursive=False, filter=normalize_tarinfo)
+
+
+class DigestWriter:
+    """Write-only file wrapper hashing everything written through it."""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.sha256 = hashlib.sha256()
+
+    def write(self, data):
+        self.sha256.update(data)
+        return self.fileobj.write(data)
+
+    def flush(self):
+        self.fileobj.flush()
+
+
+def build_attachment(public_path, name):
+    """Return the files.tar.gz attachment of public_path and its sha256, (None, None) if there is nothing to attach.
+
+    The archive is a spooled temporary file, the caller closes it after the upload.
+    """
+    if not public_path.is_dir() or not any(public_path.iterdir()):
+        return None, None
+
+    f = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    writer = DigestWriter(f)
+    write_archive(public_path, name, writer)
+    return ('files.tar.gz', f, 'application/gzip'), writer.sha256.hexdigest()
+
+
+def close_attachments(item):
+    for attachment in item['attachments']:
+        if attachment is not None:
+            attachment[1].close()
+
+
+def prepare_task(course_name, task_yml_path, manifest=None):
+    """Return task name, its digest and update_task arguments, None instead of arguments if it did not change."""
+    with open(task_yml_path, 'r') as f:
+        task_yml = yaml.safe_load(f)
+
+    task_path = task_yml_path.parent
+    name = task_yml['description']['name']
+    # the archive is built either way, its sha256 is the digest of public/
+    attachment, attachment_digest = build_attachment(task_path / 'public', name)
+    digest = task_digest(course_name, task_yml, task_path, attachment_digest)
+    if manifest is not None and manifest.unchanged(str(task_path), digest):
+        if attachment is not None:
+            attachment[1].close()
+        return name, digest, None
+
+    print(f'Updating task {name}' + (f', files.tar.gz sha256 {attachment_digest}' if attachment else ''))
+    return name, digest, {
+        'course_name': course_name,
+        'task_name': name,
+        'answer': task_yml['host-data']['flag'],
+        'difficulty': task_yml['description']['difficulty'],
+        'info_path': task_path / 'DESCRIPTION.md',
+        'writeup_path': task_path / 'solve' / 'WRITEUP.md',
+        'attachments': [attachment],
+        'files_sha256': attachment_digest,
+    }
+
+
+def upload_task(api, course_name, task_yml_path, manifest=None):
+    name, digest, item = prepare_task(course_name, task_yml_path, manifest)
+    if item is None:
+        return [(task_yml_path, name, None, digest)]
+    try:
+        status = api.update_task(**item).status_code
+    except UploadError as e:
+        status = e
+    finally:
+        close_attachments(item)
+    return [(task_yml_path, name, status, digest)]
+
+
+def upload_batch(api, tasks, manifest=None):
+    """Prepare and send one batch of (course_name, task_yml_path), return upload_task results for each.
+
+    Only this batch's archives are open at a time, they are closed before the worker takes the next batch.
+    """
+    results, pending = [], []
+    try:
+        for course_name, task_yml_path in tasks:
+            name, digest, item = prepare_task(course_name, task_yml_path, manifest)
+            if item is None:
+                results.append((task_yml_path, name, None, digest))
+            else:
+                pending.append((task_yml_path, name, digest, item))
+        if pending:
+            try:
+                statuses = api.update_tasks([item for _, _, _, item in pending])
+            except UploadError as e:
+                statuses = [e] * len(pending)
+            results += [(task_yml_path, name, status, digest) for (task_yml_path, name, digest, _), status in zip(pending, statuses)]
+    finally:
+        for _, _, _, item in pending:
+            close_attachments(item)
+    return results
 
 
 def main():
@@ -85,6 +400,52 @@ def main():
         '--path',
         default='tasks',
     )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=4,
+        help='number of tasks archived and uploaded at the same time',
+    )
+    parser.add_argument(
+        '--retries',
+        type=int,
+        default=3,
+        help='retries for failed connections and 429/5xx responses',
+    )
+    parser.add_argument(
+        '--backoff',
+        type=float,
+        default=1.0,
+        help='first retry delay in seconds, doubled on every next retry',
+    )
+    parser.add_argument(
+        '--connect-timeout',
+        type=float,
+        default=10.0,
+        help='seconds to wait for a connection to the platform',
+    )
+    parser.add_argument(
+        '--read-timeout',
+        type=float,
+        default=60.0,
+        help='seconds to wait for the platform to answer a request',
+    )
+    parser.add_argument(
+        '--manifest',
+        default='.upload-manifest.json',
+        help='file with digests of uploaded tasks, unchanged tasks are skipped',
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='upload every task, ignoring the manifest',
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=0,
+        help='send tasks in tasks/batch_update requests of up to this many changed tasks, 0 sends one request per task',
+    )
 
     args = parser.parse_args()
 
@@ -93,49 +454,84 @@ def main():
         print("Tasks directory not found")
         return
 
-    api = MCTFapi(args.url, args.api_key)
+    api = MCTFapi(
+        args.url,
+        args.api_key,
+        retries=args.retries,
+        backoff=args.backoff,
+        timeout=(args.connect_timeout, args.read_timeout),
+    )
 
-    courses = list(tasks_path.glob('*/*/topic.yml'))
+    courses = sorted(tasks_path.glob('*/*/topic.yml'))
     print(courses)
 
+    # courses go first, tasks reference them by name
+    tasks = []
     for course_yml_path in courses:
         with open(course_yml_path, 'r') as f:
             course_yml = yaml.safe_load(f)
         course_name = course_yml['description']['name']
 
         print(f'Updating course {course_name}')
-        api.update_course(
-            course_name,
-            description='No description provided',
-            difficulty=course_yml['description']['difficulty'],
-        )
-
-        tasks = list(glob.glob(f'{str(course_yml_path).split('/topic.yml')[0]}/*/task.yml'))
-        print(tasks)
-        for task_yml_path in tasks:
-            with open(task_yml_path, 'r') as f:
-                task_yml = yaml.safe_load(f)
-
-            task_path = task_yml_path.split('/task.yml')[0]
-            public_path = f'{task_path}/public'
-
-            buf = io.BytesIO()
-            with tarfile.open(fileobj=buf, mode='w:gz') as tar:
-                tar.add(public_path, task_yml['description']['name'])
-            buf.seek(0)
-
-            print(f'Updating task {task_yml['description']['name']}')
-            api.update_task(
-                course_name, 
-                task_yml['description']['name'], 
-                task_yml['host-data']['flag'], 
-                task_yml['description']['difficulty'],
-                f'{task_path}/DESCRIPTION.md',
-                f'{task_path}/solve/WRITEUP.md',
-                [('files.tar.gz', buf.getvalue(), 'application/gzip') if len(os.listdir(public_path)) != 0 else None]
+        try:
+            api.update_course(
+                course_name,
+                description='No description provided',
+                difficulty=course_yml['description']['difficulty'],
             )
+        except UploadError as e:
+            print(e)
+            exit(1)
+
+        course_tasks = sorted(course_yml_path.parent.glob('*/task.yml'))
+        print(course_tasks)
+        tasks += [(course_name, task_yml_path) for task_yml_path in course_tasks]
+
+    manifest = Manifest(Path(args.manifest), args.url)
+    known = None if args.force else manifest
+    failed = []
+    # tasks that did upload stay in the manifest even if a later one breaks the run
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+            # every future maps to the tasks it uploads, to report them if it breaks
+            if args.batch_size > 0:
+                # batches are prepared in the workers, so at most --jobs batches of archives exist at once
+                futures = {
+                    pool.submit(upload_batch, api, tasks[i:i + args.batch_size], known): tasks[i:i + args.batch_size]
+                    for i in range(0, len(tasks), args.batch_size)
+                }
+            else:
+                futures = {
+                    pool.submit(upload_task, api, course_name, task_yml_path, known): [(course_name, task_yml_path)]
+                    for course_name, task_yml_path in tasks
+                }
+
+            for future in as_completed(futures):
+                try:
+                    results = future.result()
+                except Exception as e:
+                    # e.g. a broken task.yml or an unreadable file, the other tasks go on
+                    for _, task_yml_path in futures[future]:
+                        print(f'Task {task_yml_path.parent} - {type(e).__name__}: {e}')
+                        failed.append(str(task_yml_path.parent))
+                    continue
+                for task_yml_path, name, status, digest in results:
+                    if status is None:
+                        print(f'Task {name} not changed, skipped')
+                        continue
+                    print(f'Task {name} - {status}')
+                    # status is an UploadError when the platform never answered
+                    if isinstance(status, UploadError) or status >= 400:
+                        failed.append(name)
+                    else:
+                        manifest.update(str(task_yml_path.parent), digest)
+    finally:
+        manifest.save()
+
+    if failed:
+        print(f'Failed to update tasks: {", ".join(failed)}')
+        exit(1)
 
 
 if __name__ == '__main__':
     main()
-
@@ -2,15 +2,21 @@
 
 
 import argparse
+import hashlib
+import sys
 import traceback
+from contextlib import nullcontext, redirect_stdout
 from pathlib import Path
 import os
 import json
+import subprocess
 import yaml
 from collections import defaultdict
 from dockerfile_parse import DockerfileParser
 from datetime import datetime
 from enum import Enum
+from io import StringIO
+from concurrent.futures import ProcessPoolExecutor
 from threading import Lock, current_thread
 DC_REQUIRED_OPTIONS = ["services"]
 DC_ALLOWED_OPTIONS = DC_REQUIRED_OPTIONS + ["volumes", "version"]
@@ -62,6 +68,8 @@ DIFFICULTIES = ["easy", "medium", "hard"]
 REQUIRED_TASK_KEYS = ['description', 'host-data']
 REQUIRED_DESC_KEYS = ['name']
 REQUIRED_HOST_DATA_KEYS = ['type', 'flag']
+# changes to these files can affect every task
+GLOBAL_PATHS = ['checker.py', 'requirements.txt']
 OUT_LOCK = Lock()
 DISABLE_LOG = False
 
@@ -77,22 +85,95 @@ class ColorType(Enum):
     def __str__(self):
         return self.value
 
-def colored_log(*messages, color: ColorType = ColorType.INFO):
+def colored_log(*messages, color: ColorType = ColorType.INFO, file=None):
     ts = datetime.utcnow().isoformat(sep=" ", timespec="milliseconds")
     print(
-        f"{color}{color.name} [{current_thread().name} {ts}]{ColorType.ENDC}", *messages
+        f"{color}{color.name} [{current_thread().name} {ts}]{ColorType.ENDC}", *messages, file=file
     )
 
 
 
 BASE_DIR = Path(__file__).resolve().absolute().parent
 TASKS_DIR = BASE_DIR / 'tasks'
+CACHE_FILE = BASE_DIR / '.checker-cache' / 'validate.json'
+
+
+def files_digest(base: Path, files: list[Path]) -> str:
+    h = hashlib.sha256()
+    for f in sorted(files):
+        data = f.read_bytes()
+        h.update(f"{f.relative_to(base).as_posix()}\0{len(data)}\0".encode())
+        h.update(data)
+    return h.hexdigest()
+
+
+# any change of the checker rules or its dependencies invalidates the whole cache
+CHECKER_VERSION = files_digest(BASE_DIR, [BASE_DIR / p for p in GLOBAL_PATHS if (BASE_DIR / p).is_file()])[:16]
+
+
+def task_files(path: Path) -> list[Path]:
+    # the files git would commit: running a task leaves bytecode and ignored
+    # files behind, which must not invalidate its cached validation
+    try:
+        files = [BASE_DIR / p for p in git_paths('ls-files', '--cached', '--others', '--exclude-standard', '--', str(path))]
+    except (OSError, subprocess.CalledProcessError):
+        files = path.rglob('*')
+    return [
+        f for f in files
+        if f.is_file() and '__pycache__' not in f.relative_to(path).parts and f.suffix not in ('.pyc', '.pyo')
+    ]
+
+
+def task_digest(path: Path) -> str:
+    return files_digest(path, task_files(path))
+
+
+class ValidationCache:
+    """Content hashes of tasks that passed validation with this checker version."""
+
+    def __init__(self, path: Path):
+        self._path = path
+        self._lock = Lock()
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        if not isinstance(data, dict) or data.get('version') != CHECKER_VERSION:
+            data = {'version': CHECKER_VERSION, 'tasks': {}}
+        self._data = data
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            return self._data['tasks'].get(key)
+
+    def store(self, key: str, digest: str):
+        with self._lock:
+            self._data['tasks'][key] = digest
+
+    def drop(self, key: str):
+        with self._lock:
+            self._data['tasks'].pop(key, None)
+
+    def save(self):
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self._path.with_suffix('.tmp')
+        with self._lock, open(tmp, 'w') as f:
+            json.dump(self._data, f, indent=2, sort_keys=True)
+        tmp.replace(self._path)
+
 
 class BaseValidator:
+    def __init__(self, out=None):
+        # where log lines go, None means stdout
+        self._out = out
+        self.errors = []
+        self.warnings = []
+
     def _log(self, message: str):
         with OUT_LOCK:
             if not DISABLE_LOG:
-                colored_log(f"{self}: {message}")
+                colored_log(f"{self}: {message}", file=self._out)
 
     def _fatal(self, cond, message):
         global DISABLE_LOG
@@ -100,47 +181,62 @@ class BaseValidator:
         with OUT_LOCK:
             if not cond:
                 if not DISABLE_LOG:
-                    colored_log(f"{self}: {message}", color=ColorType.FAIL)
+                    colored_log(f"{self}: {message}", color=ColorType.FAIL, file=self._out)
                 DISABLE_LOG = True
                 raise AssertionError
 
     def _warning(self, cond: bool, message: str) -> bool:
+        if not cond:
+            self.warnings.append(message)
         with OUT_LOCK:
             if not cond and not DISABLE_LOG:
-                colored_log(f"{self}: {message}", color=ColorType.WARNING)
+                colored_log(f"{self}: {message}", color=ColorType.WARNING, file=self._out)
         return not cond
 
     def _error(self, cond, message) -> bool:
+        if not cond:
+            self.errors.append(message)
         with OUT_LOCK:
             if not cond and not DISABLE_LOG:
-                colored_log(f"{self}: {message}", color=ColorType.FAIL)
+                colored_log(f"{self}: {message}", color=ColorType.FAIL, file=self._out)
         return not cond
 
 
+class InvalidTask(AssertionError):
+    def __init__(self, task: 'Task'):
+        super().__init__(f"{task} is invalid")
+        self.task = task
+
+
 class Task(BaseValidator):
     def __init__(self,BASE_DIR : Path,  name: str, category: str, topic: str):
+        super().__init__()
         self._name = name
         self._category = category
         self._topic = topic
         self._path = BASE_DIR / category / topic / name
         task_conf_path = self._path / 'task.yml'
+        if self._error(task_conf_path.exists(), "task.yml not found"):
+            raise InvalidTask(self)
         with open(task_conf_path, 'r') as f:
             task_conf = yaml.safe_load(f)
+        if self._error(isinstance(task_conf, dict), "task.yml is not dict"):
+            raise InvalidTask(self)
         for key in REQUIRED_TASK_KEYS:
             if self._error(key in task_conf.keys(), f"required key {key} not in task.yml"):
-                exit(1)
+                raise InvalidTask(self)
         if self._error(type(task_conf['description']) == dict, 'description should be dictionary') or self._error(type(task_conf['host-data']) != list, 'host-data should be dictionary'):
-            exit(1)
+            raise InvalidTask(self)
         for key in REQUIRED_DESC_KEYS:
             if self._error(key in task_conf['description'].keys(), f"required key {key} not in task.yml"):
-                exit(1)
+                raise InvalidTask(self)
         for key in REQUIRED_HOST_DATA_KEYS:
             if self._error(key in task_conf['host-data'].keys(), f"required key {key} not in task.yml"):
-                exit(1)
+                raise InvalidTask(self)
         if task_conf['host-data']['type'] == 'remote':
             if self._error((self._path / 'deploy').exists(), 'No deploy directory for remote task') or \
                 self._error(task_conf['host-data'].get('timeout') != None , "No timeout option in host-data for instance"):
-                exit(1)
+                raise InvalidTask(self)
         
         self.task_conf = task_conf
 
@@ -164,10 +260,17 @@ class Task(BaseValidator):
         return f"task {self._name}"
 
 class StructureValidator(BaseValidator):
-    def __init__(self, d: Path, task: Task):
+    def __init__(self, d: Path, task: Task, out=None, use_cache: bool = False, last_digest: str | None = None):
+        super().__init__(out)
         self._dir = d
         self._was_error = False
         self._task = task
+        # last_digest is the cached digest of the task's last successful validation
+        self._use_cache = use_cache
+        self._last_digest = last_digest
+        self.cached = False
+        # content digest of the validated task, for the caller to update the cache
+        self.digest = None
         self.task_conf = task.task_conf
 
     def _error(self, cond, message):
@@ -176,6 +279,13 @@ class StructureValidator(BaseValidator):
         return err
 
     def validate(self):
+        if self._use_cache:
+            self.digest = task_digest(self._task.path)
+            if self.digest == self._last_digest:
+                self._log("not changed since last successful validation, skipping")
+                self.cached = True
+                return True
+
         for file in REQUIRED_PATHS:
             path = self._task.path / file
             if self._error(path.exists(), f"{file} not found in service"):
@@ -356,18 +466,67 @@ class StructureValidator(BaseValidator):
 def dir_check(p : Path) -> bool:
     return p.name[0] != '.' and p.is_dir()
 
-def get_tasks(TASKS_DIR: Path, remote_only: bool = False ) -> list[Task]:
+def git_paths(command: str, *args: str) -> list[str]:
+    out = subprocess.run(
+        ['git', command, '-z', *args], cwd=BASE_DIR, capture_output=True, text=True, check=True,
+    ).stdout
+    return [p for p in out.split('\0') if p]
+
+
+def changed_tasks(ref: str) -> set[tuple] | None:
+    """(category, topic, task) triples touched since ref, None if every task is affected.
+
+    A change of topic-level files like topic.yml selects the whole topic as (category, topic, None).
+    """
+    try:
+        paths = git_paths('diff', '--name-only', '--relative', ref, '--')
+        paths += git_paths('ls-files', '--others', '--exclude-standard')
+    except (OSError, subprocess.CalledProcessError) as e:
+        with OUT_LOCK:
+            colored_log(f"Can't get changes since {ref}, selecting all tasks: {e}", color=ColorType.WARNING)
+        return None
+
+    tasks_prefix = TASKS_DIR.relative_to(BASE_DIR).parts
+    result = set()
+    for p in paths:
+        if p in GLOBAL_PATHS:
+            return None
+        parts = Path(p).parts
+        if parts[:len(tasks_prefix)] != tasks_prefix:
+            continue
+        parts = parts[len(tasks_prefix):]
+        if len(parts) > 3:
+            result.add(parts[:3])
+        elif len(parts) == 3:
+            result.add((*parts[:2], None))
+    return result
+
+
+def get_tasks(TASKS_DIR: Path, remote_only: bool = False, changed_since: str | None = None,
+              invalid: list[InvalidTask] | None = None) -> list[Task]:
+    # broken task.yml stops the run unless invalid list is given to collect them
     result = []
+    changed = changed_tasks(changed_since) if changed_since else None
     if os.getenv("TASK") in ["all", None]:
-        for category_name in TASKS_DIR.iterdir():
+        for category_name in sorted(TASKS_DIR.iterdir()):
             if dir_check(category_name):
                 topics_dir = TASKS_DIR / category_name.name
-                for topic_name in topics_dir.iterdir():
+                for topic_name in sorted(topics_dir.iterdir()):
                     if dir_check(topic_name):
                         tasks_dir = topics_dir / topic_name.name
-                        for task in tasks_dir.iterdir():
+                        for task in sorted(tasks_dir.iterdir()):
+                            if changed is not None and \
+                                    (category_name.name, topic_name.name, task.name) not in changed and \
+                                    (category_name.name, topic_name.name, None) not in changed:
+                                continue
                             if dir_check(task):
-                                t = Task(TASKS_DIR, task.name, category_name.name, topic_name.name)
+                                try:
+                                    t = Task(TASKS_DIR, task.name, category_name.name, topic_name.name)
+                                except InvalidTask as e:
+                                    if invalid is None:
+                                        raise
+                                    invalid.append(e)
+                                    continue
                                 if not remote_only:
                                     result.append(t)
                                 elif t.task_conf['host-data']['type'] == 'remote':
@@ -375,15 +534,21 @@ def get_tasks(TASKS_DIR: Path, remote_only: bool = False ) -> list[Task]:
     else:
         try:
             a = json.loads(os.environ['TASK'])
-            result = [Task(TASKS_DIR, a['name'], a['category'], a['topic'])]
+            name, category, topic = a['name'], a['category'], a['topic']
         except:
             colored_log("Invalid TASK env structure", color=ColorType.FAIL)
             exit(1)
+        try:
+            result = [Task(TASKS_DIR, name, category, topic)]
+        except InvalidTask as e:
+            if invalid is None:
+                raise
+            invalid.append(e)
     with OUT_LOCK:
         colored_log("Got services:", ", ".join(map(str, result)))
     return result
 def list_tasks(_args: argparse.Namespace):
-    tasks = get_tasks(TASKS_DIR, _args.remote)
+    tasks = get_tasks(TASKS_DIR, _args.remote, _args.changed_since)
     if outfile := os.getenv("GITHUB_OUTPUT"):
         data = {
             "include": [{"task": json.dumps({'name': task.name, 'category': task.category, 'topic': task.topic})} for task in tasks],
@@ -393,16 +558,87 @@ def list_tasks(_args: argparse.Namespace):
             f.write(f"matrix={json.dumps(data)}")
 
 
+def task_key(task: Task) -> str:
+    return task.path.relative_to(TASKS_DIR).as_posix()
+
+
+def run_validator(path: Path, buffered: bool = False, use_cache: bool = False,
+                  last_digest: str | None = None) -> tuple[str, str | None, list[str], list[str], str]:
+    """Validate the task at path, returns (status, digest, errors, warnings, output).
+
+    Runs in a worker process with several jobs, so it takes the task path and returns plain data;
+    every task then logs into its own buffer, printed in task order once all of them are done.
+    """
+    task = Task(TASKS_DIR, path.name, path.parent.parent.name, path.parent.name)
+    out = StringIO() if buffered else None
+    validator = StructureValidator(TASKS_DIR, task, out, use_cache, last_digest)
+    ok = validator.validate()
+    status = 'cached' if validator.cached else 'passed' if ok else 'failed'
+    return status, validator.digest, validator.errors, validator.warnings, out.getvalue() if buffered else ""
+
+
+def task_report(task: Task, status: str, errors: list[str], warnings: list[str]) -> dict:
+    return {
+        'task': task_key(task),
+        'name': task.name,
+        'category': task.category,
+        'topic': task.topic,
+        'status': status,
+        'exit_code': int(status == 'failed'),
+        'errors': errors,
+        'warnings': warnings,
+    }
+
+
+def run_validation(_args) -> list[dict]:
+    invalid = []
+    tasks = get_tasks(TASKS_DIR, changed_since=_args.changed_since, invalid=invalid)
+    report = [task_report(e.task, 'failed', e.task.errors, e.task.warnings) for e in invalid]
+    cache = None if _args.no_cache else ValidationCache(CACHE_FILE)
+    jobs = max(1, min(_args.jobs, len(tasks)))
+    args = (
+        [task.path for task in tasks],
+        [jobs > 1] * len(tasks),
+        [cache is not None] * len(tasks),
+        [cache.get(task_key(task)) if cache is not None else None for task in tasks],
+    )
+    # validation is mostly hashing and parsing, a thread pool would serialize on the GIL
+    with ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else nullcontext() as pool:
+        results = pool.map(run_validator, *args) if pool is not None else map(run_validator, *args)
+        for task, (status, digest, errors, warnings, output) in zip(tasks, results):
+            if output:
+                with OUT_LOCK:
+                    print(output, end="")
+            if cache is not None:
+                if status == 'failed':
+                    cache.drop(task_key(task))
+                else:
+                    cache.store(task_key(task), digest)
+            report.append(task_report(task, status, errors, warnings))
+    if cache is not None:
+        cache.save()
+    return sorted(report, key=lambda r: r['task'])
+
+
 def validate_structure(_args):
-    was_error = False
-    for task in get_tasks(TASKS_DIR):
-        validator = StructureValidator(TASKS_DIR, task)
-        if not validator.validate():
-            was_error = True
+    if _args.report == 'json':
+        # keep stdout for the report only
+        with redirect_stdout(sys.stderr):
+            report = run_validation(_args)
+    else:
+        report = run_validation(_args)
+    was_error = any(r['exit_code'] for r in report)
+
+    if _args.report == 'json':
+        print(json.dumps({
+            'checker_version': CHECKER_VERSION,
+            'exit_code': int(was_error),
+            'tasks': report,
+        }, indent=2, ensure_ascii=False))
 
     if was_error:
         with OUT_LOCK:
-            colored_log("Structure validator: failed", color=ColorType.FAIL)
+            colored_log("Structure validator: failed", color=ColorType.FAIL, file=sys.stderr if _args.report == 'json' else None)
             raise AssertionError
 
 if __name__ == "__main__":
@@ -416,12 +652,32 @@ if __name__ == "__main__":
         help="List tasks to test",
     )
     list_parser.add_argument('--remote', action='store_true')
+    list_parser.add_argument(
+        '--changed-since', metavar='REF',
+        help="Only list tasks changed since git REF (changes to checker.py or requirements.txt select all)",
+    )
     list_parser.set_defaults(func=list_tasks)
     
     validate_parser = subparsers.add_parser(
         "validate",
         help="Run structure validation",
     )
+    validate_parser.add_argument(
+        '-j', '--jobs', type=int, default=1,
+        help="Number of tasks validated in parallel",
+    )
+    validate_parser.add_argument(
+        '--no-cache', action='store_true',
+        help="Validate every task, ignoring and not updating .checker-cache",
+    )
+    validate_parser.add_argument(
+        '--report', choices=['text', 'json'], default='text',
+        help="json prints per-task results to stdout, logs go to stderr",
+    )
+    validate_parser.add_argument(
+        '--changed-since', metavar='REF',
+        help="Only validate tasks changed since git REF (changes to checker.py or requirements.txt select all)",
+    )
     validate_parser.set_defaults(func=validate_structure)
     parsed = parser.parse_args()
     if "func" not in parsed:
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""Load generator for the netcat-style tasks.
+
+Opens many concurrent sessions against a task service, plays its line
+protocol with wrong answers and reports latency percentiles, throughput and
+failures, e.g. to size pids_limit / mem_limit / cpus in compose.yaml:
+
+    ./loadtest.py basic_dlp --concurrency 64 --sessions 2000
+    ./loadtest.py pohlig_hellman --serve --duration 30
+
+By default the task is expected on 127.0.0.1 at the host port from its
+compose.yaml (`docker compose up` in deploy/). With --serve the task's
+deploy/server.py is started locally instead.
+"""
+
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+import yaml
+
+BASE_DIR = Path(__file__).resolve().absolute().parent
+TASKS_DIR = BASE_DIR / 'tasks'
+
+
+class ProtocolError(Exception):
+    pass
+
+
+class Session:
+    """One connection to a task, timing the first byte it receives."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, started: float):
+        self.reader = reader
+        self.writer = writer
+        self.started = started
+        self.first_byte = None
+
+    def _received(self, data: bytes) -> str:
+        if not data:
+            raise ProtocolError('connection closed by the service')
+        if self.first_byte is None:
+            self.first_byte = time.perf_counter() - self.started
+        return data.decode(errors='replace')
+
+    async def lines(self, count: int = 1) -> list[str]:
+        return [self._received(await self.reader.readline()).rstrip('\n') for _ in range(count)]
+
+    async def until(self, separator: str) -> str:
+        try:
+            data = await self.reader.readuntil(separator.encode())
+        except asyncio.IncompleteReadError as e:
+            data = e.partial
+            if data:
+                raise ProtocolError(f'expected {separator!r}, got {data[-40:]!r}')
+        return self._received(data)
+
+    async def send(self, *values):
+        self.writer.write(''.join(f'{v}\n' for v in values).encode())
+        await self.writer.drain()
+
+    async def expect(self, text: str):
+        line, = await self.lines()
+        if line != text:
+            raise ProtocolError(f'expected {text!r}, got {line[:40]!r}')
+
+    async def eof(self):
+        rest = await self.reader.read()
+        if rest.strip():
+            raise ProtocolError(f'unexpected output {rest[:40]!r}')
+
+
+# protocols: play one session with wrong answers, `rounds` for the looping tasks
+
+async def dlp(s: Session, rounds: int):
+    # p, g, public
+    await s.lines(3)
+    await s.send(0)
+    await s.expect('Try again')
+
+async def basic_orders(s: Session, rounds: int):
+    # p, g and three lines of the statement
+    await s.lines(5)
+    await s.send(1, 1)
+    await s.expect('Try again')
+
+async def basic_equations(s: Session, rounds: int):
+    for i in range(rounds):
+        # scalar product, coefficients, prompt without a newline
+        await s.lines(2)
+        await s.until(': ')
+        await s.send(1 if i == rounds - 1 else 0)
+    await s.eof()
+
+async def square_roots(s: Session, rounds: int):
+    # n, p, q
+    await s.lines(3)
+    for _ in range(rounds):
+        await s.lines()
+        await s.send(0)
+        await s.expect('Try again')
+
+async def print_only(lines: int, s: Session, rounds: int):
+    await s.lines(lines)
+    await s.eof()
+
+PROTOCOLS = {
+    'basic_dlp': dlp,
+    'pohlig_hellman': dlp,
+    'basic_orders': basic_orders,
+    'basic_equations': basic_equations,
+    'square_roots': square_roots,
+    # statement, n, p, q, e, ciphertext
+    'broken_rsa': lambda s, rounds: print_only(6, s, rounds),
+    # p, 2^secret
+    'pohlig_hellman2': lambda s, rounds: print_only(2, s, rounds),
+}
+
+
+@dataclass
+class Result:
+    connect: float = None
+    first_byte: float = None
+    total: float = None
+    error: str = None
+
+
+@dataclass
+class Stats:
+    results: list = field(default_factory=list)
+    elapsed: float = 0.0
+    server: dict = field(default_factory=dict)
+
+
+def failure(e: BaseException) -> str:
+    if isinstance(e, asyncio.TimeoutError):
+        return 'timeout'
+    if isinstance(e, ConnectionRefusedError):
+        return 'refused'
+    if isinstance(e, ConnectionResetError):
+        return 'reset'
+    if isinstance(e, ProtocolError):
+        return f'protocol: {e}'
+    return type(e).__name__
+
+
+async def run_session(protocol, host: str, port: int, rounds: int, timeout: float) -> Result:
+    result = Result()
+    started = time.perf_counter()
+    writer = None
+    try:
+        async with asyncio.timeout(timeout):
+            reader, writer = await asyncio.open_connection(host, port)
+            result.connect = time.perf_counter() - started
+            session = Session(reader, writer, started)
+            await protocol(session, rounds)
+            result.first_byte = session.first_byte
+    except (OSError, asyncio.TimeoutError, ProtocolError) as e:
+        result.error = failure(e)
+    finally:
+        if writer is not None:
+            writer.close()
+    result.total = time.perf_counter() - started
+    return result
+
+
+async def run_load(protocol, args: argparse.Namespace, port: int) -> Stats:
+    stats = Stats()
+    started = time.perf_counter()
+    deadline = started + args.duration if args.duration else None
+    remaining = args.sessions
+
+    async def worker():
+        nonlocal remaining
+        while True:
+            if deadline is not None:
+                if time.perf_counter() >= deadline:
+                    return
+            elif remaining <= 0:
+                return
+            else:
+                remaining -= 1
+            stats.results.append(await run_session(protocol, args.host, port, args.rounds, args.timeout))
+
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+def percentiles(values: list[float]) -> dict:
+    values = sorted(values)
+    if not values:
+        return {}
+    pick = lambda q: values[min(len(values) - 1, int(q * len(values)))]
+    return {'p50': pick(0.5), 'p90': pick(0.9), 'p99': pick(0.99), 'max': values[-1]}
+
+
+def summary(stats: Stats) -> dict:
+    ok = [r for r in stats.results if r.error is None]
+    return {
+        'sessions': len(stats.results),
+        'ok': len(ok),
+        'failure_rate': 1 - len(ok) / len(stats.results) if stats.results else 0.0,
+        'failures': dict(Counter(r.error for r in stats.results if r.error is not None).most_common()),
+        'elapsed': stats.elapsed,
+        'throughput': len(ok) / stats.elapsed if stats.elapsed else 0.0,
+        'latency': {
+            'connect': percentiles([r.connect for r in stats.results if r.connect is not None]),
+            'first_byte': percentiles([r.first_byte for r in ok]),
+            'session': percentiles([r.total for r in ok]),
+        },
+        'server': stats.server,
+    }
+
+
+def print_summary(task: str, s: dict):
+    print(f"{task}: {s['ok']}/{s['sessions']} sessions ok in {s['elapsed']:.1f}s, "
+          f"{s['throughput']:.1f} sessions/s, failure rate {s['failure_rate']:.1%}")
+    for name, p in s['latency'].items():
+        if p:
+            print(f"  {name:<10}", '  '.join(f"{k} {v * 1000:8.1f}ms" for k, v in p.items()))
+    for error, count in s['failures'].items():
+        print(f"  {count:>6} x {error}")
+    if s['server']:
+        print('  server', '  '.join(f"{k} {v}" for k, v in s['server'].items()))
+
+
+def find_deploy(task: str) -> Path:
+    for path in sorted(TASKS_DIR.glob(f'*/*/{task}/deploy')):
+        return path
+    raise SystemExit(f'no deploy/ directory for task {task}')
+
+
+def compose_port(deploy: Path) -> int:
+    # host side of the first "HOST:1337" mapping
+    with open(deploy / 'compose.yaml') as f:
+        compose = yaml.safe_load(f)
+    for service in compose['services'].values():
+        for mapping in service.get('ports', []):
+            host, _, container = str(mapping).rpartition(':')
+            if container == '1337':
+                return int(host.rpartition(':')[2])
+    raise SystemExit(f'{deploy / "compose.yaml"} does not publish port 1337')
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port: int, process: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f'server exited with code {process.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise SystemExit(f'server did not listen on port {port} within {timeout}s')
+
+
+def pool_specs(deploy: Path) -> list[str]:
+    """The SHAPE:BITS specs the container CMD keeps a prime pool of."""
+    keep = re.search(r'primes\.py keep ([^&"]+)', (deploy / 'Dockerfile').read_text())
+    return keep.group(1).split() if keep else []
+
+
+def fill_pool(deploy: Path, pool_dir: str, count: int):
+    """Generate `count` primes of every pool shape of the task into pool_dir, before the server starts."""
+    specs = pool_specs(deploy)
+    if specs:
+        env = dict(os.environ, PRIME_POOL_DIR=pool_dir, PRIME_POOL_SIZE=str(count))
+        subprocess.run([sys.executable, 'primes.py', 'fill', *specs], cwd=deploy, env=env, check=True)
+
+
+def start_server(deploy: Path, port: int, pool_dir: str, keep: bool = True,
+                 env: dict | None = None) -> list[subprocess.Popen]:
+    """Start deploy/server.py like the container CMD does, with its prime pool worker if any and `keep`."""
+    env = dict(os.environ, **(env or {}), PORT=str(port), PRIME_POOL_DIR=pool_dir)
+    processes = []
+    specs = pool_specs(deploy)
+    if specs and keep:
+        processes.append(subprocess.Popen([sys.executable, 'primes.py', 'keep', *specs], cwd=deploy, env=env))
+    processes.append(subprocess.Popen([sys.executable, 'server.py', 'task'], cwd=deploy, env=env))
+    return processes
+
+
+def server_usage(pid: int) -> dict:
+    # peak memory and threads of the server process, Linux only
+    try:
+        status = Path(f'/proc/{pid}/status').read_text()
+    except OSError:
+        return {}
+    fields = dict(line.split(':', 1) for line in status.splitlines() if ':' in line)
+    return {'peak_rss': fields['VmHWM'].strip(), 'threads': int(fields['Threads'])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test a netcat-style task service')
+    parser.add_argument('task', choices=sorted(PROTOCOLS))
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, help='defaults to the host port in compose.yaml')
+    parser.add_argument('--serve', action='store_true', help='start deploy/server.py locally instead')
+    parser.add_argument('-c', '--concurrency', type=int, default=16, help='sessions open at once')
+    parser.add_argument('-n', '--sessions', type=int, default=500, help='sessions in total')
+    parser.add_argument('-d', '--duration', type=float, help='run for this many seconds instead of --sessions')
+    parser.add_argument('--rounds', type=int, default=10, help='wrong answers per session in looping tasks')
+    parser.add_argument('--timeout', type=float, default=30.0, help='seconds per session')
+    parser.add_argument('--report', choices=['text', 'json'], default='text')
+    args = parser.parse_args()
+
+    deploy = find_deploy(args.task)
+    processes = []
+    with tempfile.TemporaryDirectory(prefix='loadtest-') as pool_dir:
+        try:
+            if args.serve:
+                args.host = '127.0.0.1'
+                port = args.port or free_port()
+                processes = start_server(deploy, port, pool_dir)
+                wait_for_port(port, processes[-1])
+            else:
+                port = args.port or compose_port(deploy)
+            stats = asyncio.run(run_load(PROTOCOLS[args.task], args, port))
+            if processes:
+                stats.server = server_usage(processes[-1].pid)
+        finally:
+            for process in processes:
+                process.terminate()
+                process.wait()
+
+    result = summary(stats)
+    if args.report == 'json':
+        json.dump({'task': args.task, **result}, sys.stdout, indent=2)
+        print()
+    else:
+        print_summary(args.task, result)
+
+
+if __name__ == '__main__':
+    main()
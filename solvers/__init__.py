@@ -0,0 +1,20 @@
+"""Reference solvers for the tasks, one module per task.
+
+A module for a task with a deploy/ service exposes `solve(connect) -> str`,
+where connect() opens a new `Remote` to the service; one for a task that only
+hands out files exposes `solve(public: Path) -> str`. Both return the flag. Run them with
+`python -m solvers`.
+"""
+
+
+SOLVERS = [
+    'basic_dlp',
+    'basic_equations',
+    'basic_ops',
+    'basic_orders',
+    'broken_rsa',
+    'hard_equations',
+    'pohlig_hellman',
+    'pohlig_hellman2',
+    'square_roots',
+]
@@ -0,0 +1,174 @@
+"""Run the reference solvers against the tasks and benchmark them.
+
+    python -m solvers                      # every task, services from `docker compose up`
+    python -m solvers basic_dlp --serve    # start deploy/server.py locally instead
+    python -m solvers --runs 5 --record    # store the medians in solvers/benchmarks.json
+
+A task fails if a solver errors or returns a different flag than task.yml,
+or if a solve takes longer than the task's timeout. Medians that moved by
+more than BENCH_FACTOR from the recorded ones are reported as slower or
+faster: the task may have become infeasible or trivial.
+"""
+
+
+import argparse
+import importlib
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+import yaml
+from loadtest import compose_port, fill_pool, free_port, start_server, wait_for_port
+from . import SOLVERS
+from .remote import Remote
+
+BASE_DIR = Path(__file__).resolve().absolute().parent.parent
+TASKS_DIR = BASE_DIR / 'tasks'
+BENCHMARKS_FILE = Path(__file__).resolve().parent / 'benchmarks.json'
+BENCH_FACTOR = 3.0
+# differences below this are noise, whatever the factor
+BENCH_SLACK = 0.1
+
+
+def find_task(task: str) -> Path:
+    for path in sorted(TASKS_DIR.glob(f'*/*/{task}')):
+        if (path / 'task.yml').exists():
+            return path
+    raise SystemExit(f'no task {task}')
+
+
+def load_benchmarks() -> dict:
+    try:
+        with open(BENCHMARKS_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def compare(median: float, recorded: float) -> str:
+    if abs(median - recorded) < BENCH_SLACK:
+        return None
+    if median > recorded * BENCH_FACTOR:
+        return 'slower'
+    if median * BENCH_FACTOR < recorded:
+        return 'faster'
+    return None
+
+
+def pool_primes(runs: int) -> int:
+    # a session takes at most two primes; an instance pool of `runs` instances
+    # takes `runs` primes when it starts and one more per session
+    return 2 * runs + 1
+
+
+def run_task(task: str, args: argparse.Namespace, benchmarks: dict) -> dict:
+    task_dir = find_task(task)
+    with open(task_dir / 'task.yml') as f:
+        host_data = yaml.safe_load(f)['host-data']
+    # task.yml timeouts are in milliseconds
+    timeout = host_data['timeout'] / 1000 if host_data.get('timeout') else None
+    solver = importlib.import_module(f'{__package__}.{task}')
+
+    result = {'task': task, 'times': [], 'errors': [], 'timeout': timeout}
+    processes = []
+    with tempfile.TemporaryDirectory(prefix='solvers-') as pool_dir:
+        try:
+            deploy = task_dir / 'deploy'
+            # broken_rsa is `type: local` in task.yml but still a service
+            if deploy.is_dir():
+                host, port = args.host, args.port
+                if args.serve:
+                    host, port = '127.0.0.1', free_port()
+                    # only the solver is timed: the pools are filled up front for every run, and
+                    # no prime worker refills them in the background, competing for the CPU
+                    fill_pool(deploy, pool_dir, pool_primes(args.runs))
+                    processes = start_server(deploy, port, pool_dir, keep=False,
+                                             env={'INSTANCE_POOL_SIZE': str(args.runs)})
+                    wait_for_port(port, processes[-1])
+                elif port is None:
+                    port = compose_port(deploy)
+                target = lambda: Remote(host, port)
+            else:
+                target = task_dir / 'public'
+
+            for _ in range(args.runs):
+                started = time.perf_counter()
+                try:
+                    flag = solver.solve(target)
+                except Exception as e:
+                    result['errors'].append(f'{type(e).__name__}: {e}')
+                    continue
+                elapsed = time.perf_counter() - started
+                if flag.strip() != host_data['flag']:
+                    result['errors'].append(f'wrong flag {flag[:60]!r}')
+                    continue
+                result['times'].append(elapsed)
+        finally:
+            for process in processes:
+                process.terminate()
+                process.wait()
+
+    times = result['times']
+    result['median'] = statistics.median(times) if times else None
+    result['max'] = max(times) if times else None
+    result['recorded'] = benchmarks.get(task)
+    if result['errors']:
+        result['status'] = 'failed'
+    elif timeout is not None and result['max'] > timeout:
+        result['status'] = 'over timeout'
+    elif result['recorded'] is not None and compare(result['median'], result['recorded']):
+        result['status'] = compare(result['median'], result['recorded'])
+    else:
+        result['status'] = 'ok'
+    return result
+
+
+def print_result(result: dict):
+    seconds = lambda v: f'{v:8.3f}s' if v is not None else '        -'
+    print(f"{result['task']:<16} {result['status']:<12} median {seconds(result['median'])}  "
+          f"max {seconds(result['max'])}  timeout {seconds(result['timeout'])}  "
+          f"recorded {seconds(result['recorded'])}")
+    for error in result['errors']:
+        print(f'  {error}')
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m solvers', description='Solve and benchmark the tasks')
+    parser.add_argument('tasks', nargs='*', metavar='TASK', help=f'defaults to all of: {", ".join(SOLVERS)}')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, help='defaults to the host port in compose.yaml')
+    parser.add_argument('--serve', action='store_true', help='start deploy/server.py locally')
+    parser.add_argument('--runs', type=int, default=3, help='solves per task')
+    parser.add_argument('--record', action='store_true', help=f'store the medians in {BENCHMARKS_FILE.name}')
+    parser.add_argument('--report', choices=['text', 'json'], default='text')
+    args = parser.parse_args()
+    tasks = args.tasks or SOLVERS
+    for task in tasks:
+        if task not in SOLVERS:
+            parser.error(f'no solver for {task}')
+    if args.port is not None and len(tasks) > 1:
+        parser.error('--port needs a single task')
+
+    benchmarks = load_benchmarks()
+    results = []
+    for task in tasks:
+        results.append(run_task(task, args, benchmarks))
+        if args.report == 'text':
+            print_result(results[-1])
+
+    if args.report == 'json':
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    if args.record:
+        benchmarks.update({r['task']: round(r['median'], 4) for r in results if r['status'] != 'failed'})
+        with open(BENCHMARKS_FILE, 'w') as f:
+            json.dump(dict(sorted(benchmarks.items())), f, indent=2)
+            f.write('\n')
+    if any(r['status'] in ('failed', 'over timeout') for r in results):
+        exit(1)
+
+
+if __name__ == '__main__':
+    main()
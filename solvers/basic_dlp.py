@@ -0,0 +1,12 @@
+"""basic_dlp: log of `public` to base 2 mod a safe prime p = 2q + 1, q of 64 bits."""
+
+
+from .dlog import smooth_log
+
+
+def solve(connect) -> str:
+    with connect() as r:
+        p, g, public = r.recvint('p'), r.recvint('g'), r.recvint('public')
+        x, _, _ = smooth_log(public, g, p, solve_cofactor=True)
+        r.sendline(x)
+        return r.recvflag()
@@ -0,0 +1,24 @@
+"""basic_equations: every round is one linear equation over GF(257) in the flag bytes."""
+
+
+import ast
+from .gf import System
+
+P = 257
+
+
+def solve(connect) -> str:
+    system = None
+    with connect() as r:
+        while True:
+            value = r.recvint()
+            coefficients = ast.literal_eval(r.recvline())
+            r.recvuntil(': ')
+            if system is None:
+                system = System(len(coefficients), P)
+            system.add(coefficients, value)
+            if system.full:
+                r.sendline(1)
+                break
+            r.sendline(0)
+    return bytes(system.solution().tolist()).decode()
@@ -0,0 +1,9 @@
+"""basic_ops: x_{i+1} = a x_i + b mod p, three outputs give a and b, then step back to the seed."""
+
+
+from pathlib import Path
+from .lcg import recover
+
+
+def solve(public: Path) -> str:
+    return recover('basic_ops', (public / 'output.txt').read_text()).decode()
@@ -0,0 +1,11 @@
+"""basic_orders: public^(p-1) = g^(p-1) = 1 by Fermat's little theorem."""
+
+
+def solve(connect) -> str:
+    with connect() as r:
+        p = r.recvint('p')
+        r.recvint('g')
+        for _ in range(3):
+            r.recvline()
+        r.sendline(p - 1, p - 1)
+        return r.recvflag()
@@ -0,0 +1,17 @@
+"""broken_rsa: e = 2 * 65537, undo 65537 as in RSA, then take square roots as in Rabin."""
+
+
+from .ntheory import is_flag, to_bytes
+from .roots import sqrt_mod_all
+
+
+def solve(connect) -> str:
+    with connect() as r:
+        r.recvline()
+        n, p, q, e = r.recvint('n'), r.recvint('p'), r.recvint('q'), r.recvint('e')
+        c = r.recvint()
+    square = pow(c, pow(e // 2, -1, (p - 1) * (q - 1)), n)
+    for m in sqrt_mod_all(square, {p: 1, q: 1}):
+        if is_flag(to_bytes(m)):
+            return to_bytes(m).decode()
+    raise ValueError('no square root decodes as a flag')
@@ -0,0 +1,374 @@
+"""Discrete logarithms mod a prime p.
+
+bsgs() keeps its baby steps in an open-addressing table over array('Q'),
+16 bytes an entry instead of a dict of Python ints, so 2^16 steps fit in
+2 MiB. pollard_rho() needs memory only for its distinguished points and,
+like the relation search of index_calculus(), spreads its walks over a
+process pool.
+"""
+
+
+import math
+import os
+import random
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache
+from typing import NamedTuple
+from .ntheory import crt, factor_smooth, is_probable_prime, sieve
+
+# prime subgroup orders up to BSGS_LIMIT use BSGS, up to RHO_LIMIT Pollard
+# rho, above that index calculus; rho overtakes BSGS with its Python-built
+# table at about 2^32
+BSGS_LIMIT = 1 << 32
+RHO_LIMIT = 1 << 48
+# index calculus factor base: primes below this bound
+FACTOR_BASE_BOUND = 4000
+# smaller problems are not worth starting worker processes for
+PARALLEL_LIMIT = 1 << 36
+# r-adding walk of Pollard rho
+RHO_MULTIPLIERS = 20
+# steps of a worker between reports to the main process
+RHO_BATCH = 1 << 16
+RELATION_BATCH = 32
+# Pohlig-Hellman solves subgroups of at least this prime order in parallel
+PARALLEL_SUBGROUP = 1 << 24
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+class BabySteps:
+    """g^j -> j for j < m, in an open-addressing table with linear probing.
+
+    A key is a 64-bit fingerprint of g^j, candidates are checked by the
+    caller, so a fingerprint collision costs one extra pow().
+    """
+
+    def __init__(self, g: int, p: int, m: int):
+        self.g, self.p, self.m = g, p, m
+        size = 1 << (2 * m - 1).bit_length()
+        self._mask = size - 1
+        self._keys = array('Q', bytes(8 * size))
+        self._steps = array('Q', bytes(8 * size))
+        e = 1
+        for j in range(m):
+            self._insert(self._key(e), j)
+            e = e * g % p
+
+    @staticmethod
+    def _key(e: int) -> int:
+        # non-zero, 0 marks an empty slot
+        return e % 0xFFFFFFFFFFFFFFFF + 1
+
+    def _insert(self, key: int, j: int):
+        i = key & self._mask
+        while self._keys[i]:
+            if self._keys[i] == key:
+                return
+            i = (i + 1) & self._mask
+        self._keys[i] = key
+        self._steps[i] = j
+
+    def lookup(self, e: int) -> list[int]:
+        key = self._key(e)
+        i = key & self._mask
+        found = []
+        while self._keys[i]:
+            if self._keys[i] == key:
+                found.append(self._steps[i])
+            i = (i + 1) & self._mask
+        return found
+
+
+@lru_cache(maxsize=16)
+def baby_steps(g: int, p: int, m: int) -> BabySteps:
+    # Pohlig-Hellman solves every digit of a prime power with the same g
+    return BabySteps(g, p, m)
+
+
+def bsgs(h: int, g: int, p: int, n: int) -> int:
+    """x in [0, n) with g^x = h mod p, where g has order n; None if there is none."""
+    m = math.isqrt(n) + 1
+    table = baby_steps(g, p, m)
+    giant = pow(g, -m, p)
+    e = h
+    for i in range(m):
+        for j in table.lookup(e):
+            x = i * m + j
+            if pow(g, x, p) == h:
+                return x % n
+        e = e * giant % p
+    return None
+
+
+def _rho_walks(g: int, h: int, p: int, n: int, multipliers: list, dp_mask: int, steps: int, seed: int) -> list:
+    # walks from random starts until `steps` steps are done, returns the
+    # distinguished points (x, a, b) with x = g^a h^b that ended them
+    rng = random.Random(seed)
+    # a walk caught in a cycle without distinguished points is abandoned
+    max_walk = 20 * (dp_mask + 1)
+    found = []
+    done = 0
+    while done < steps:
+        a, b = rng.randrange(n), rng.randrange(n)
+        x = pow(g, a, p) * pow(h, b, p) % p
+        for length in range(max_walk):
+            if not x & dp_mask:
+                found.append((x, a % n, b % n))
+                break
+            mx, ma, mb = multipliers[x % RHO_MULTIPLIERS]
+            x, a, b = x * mx % p, a + ma, b + mb
+        done += length + 1
+    return found
+
+def pollard_rho(h: int, g: int, p: int, n: int, workers: int = None) -> int:
+    """log_g h for g of prime order n, parallel Pollard rho with distinguished points."""
+    workers = workers or default_workers()
+    rng = random.Random()
+    multipliers = []
+    for _ in range(RHO_MULTIPLIERS):
+        a, b = rng.randrange(n), rng.randrange(n)
+        multipliers.append((pow(g, a, p) * pow(h, b, p) % p, a, b))
+    # about 2^6 distinguished points per sqrt(n) steps
+    dp_mask = (1 << max(0, n.bit_length() // 2 - 6)) - 1
+    args = (g, h, p, n, multipliers, dp_mask, RHO_BATCH)
+    points = {}
+
+    def collide(batch):
+        for x, a, b in batch:
+            if x in points and points[x][1] != b:
+                a2, b2 = points[x]
+                log = (a - a2) * pow(b2 - b, -1, n) % n
+                if pow(g, log, p) == h:
+                    return log
+            points[x] = (a, b)
+        return None
+
+    if workers == 1 or n < PARALLEL_LIMIT:
+        while True:
+            log = collide(_rho_walks(*args, rng.getrandbits(64)))
+            if log is not None:
+                return log
+    with ProcessPoolExecutor(workers) as pool:
+        pending = {pool.submit(_rho_walks, *args, rng.getrandbits(64)) for _ in range(2 * workers)}
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                log = collide(future.result())
+                if log is not None:
+                    for other in pending:
+                        other.cancel()
+                    return log
+                pending.add(pool.submit(_rho_walks, *args, rng.getrandbits(64)))
+
+
+def _half(r: int, p: int, bound: int) -> tuple[int, int]:
+    # u / v = r mod p with |u|, |v| < bound, by the extended Euclidean algorithm
+    r0, r1, t0, t1 = p, r, 0, 1
+    while r1 >= bound:
+        k = r0 // r1
+        r0, r1 = r1, r0 - k * r1
+        t0, t1 = t1, t0 - k * t1
+    return r1, abs(t1)
+
+def _factor(n: int, factor_base: list[int], product: int) -> dict[int, int]:
+    # exponents of n over the factor base, None unless n is smooth
+    if n == 0:
+        return None
+    # n is smooth iff it divides product^k for k >= log2(n)
+    if n > 1 and pow(product % n, 1 << n.bit_length().bit_length(), n):
+        return None
+    exponents = {}
+    for q in factor_base:
+        if n % q == 0:
+            e = 0
+            while n % q == 0:
+                n //= q
+                e += 1
+            exponents[q] = e
+            if n == 1:
+                break
+    return exponents
+
+def _relation(r: int, p: int, bound: int, factor_base: list[int], product: int) -> dict[int, int]:
+    u, v = _half(r, p, bound)
+    top = _factor(u, factor_base, product)
+    if top is None:
+        return None
+    bottom = _factor(v, factor_base, product)
+    if bottom is None:
+        return None
+    for q, e in bottom.items():
+        top[q] = top.get(q, 0) - e
+    return top
+
+def _solve_sparse(rows: list[tuple[dict[int, int], int]], q: int) -> dict[int, int]:
+    # structured Gaussian elimination mod q: sparse (large prime) columns first,
+    # fill-in then collects in the dense small-prime columns; returns every
+    # column the rows determine
+    active = [({c: e % q for c, e in row.items() if e % q}, k % q) for row, k in rows]
+    columns = sorted({c for row, _ in active for c in row}, reverse=True)
+    pivots = []
+    for c in columns:
+        candidates = [i for i, (row, _) in enumerate(active) if c in row]
+        if not candidates:
+            continue
+        best = min(candidates, key=lambda i: len(active[i][0]))
+        row, k = active.pop(best)
+        inv = pow(row[c], -1, q)
+        row = {x: y * inv % q for x, y in row.items()}
+        k = k * inv % q
+        pivots.append((c, row, k))
+        for i, (other, ok) in enumerate(active):
+            f = other.get(c)
+            if f:
+                other = dict(other)
+                for x, y in row.items():
+                    v = (other.get(x, 0) - f * y) % q
+                    if v:
+                        other[x] = v
+                    else:
+                        other.pop(x, None)
+                active[i] = (other, (ok - f * k) % q)
+    logs = {}
+    for c, row, k in reversed(pivots):
+        if all(x in logs for x in row if x != c):
+            logs[c] = (k - sum(y * logs[x] for x, y in row.items() if x != c)) % q
+    return logs
+
+def _relations(g: int, p: int, bound: int, count: int, seed: int) -> list:
+    # `count` relations g^k = u / v with u, v smooth
+    rng = random.Random(seed)
+    factor_base = sieve(bound)
+    product = math.prod(factor_base)
+    root = math.isqrt(p) + 1
+    step = rng.randrange(1, p - 1)
+    g_step = pow(g, step, p)
+    r, k = 1, 0
+    rows = []
+    while len(rows) < count:
+        r, k = r * g_step % p, k + step
+        relation = _relation(r, p, root, factor_base, product)
+        if relation is not None:
+            rows.append((relation, k))
+    return rows
+
+def index_calculus(h: int, g: int, p: int, q: int, bound: int = FACTOR_BASE_BOUND, workers: int = None) -> int:
+    """log_g h mod the odd prime q, where q divides the order of g but not (p - 1) / q."""
+    workers = workers or default_workers()
+    factor_base = sieve(bound)
+    needed = len(factor_base) + 30
+    rng = random.Random()
+    if workers == 1:
+        rows = _relations(g, p, bound, needed, rng.getrandbits(64))
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            batches = needed // RELATION_BATCH + 1
+            rows = []
+            for batch in pool.map(_relations, *zip(*(
+                (g, p, bound, RELATION_BATCH, rng.getrandbits(64)) for _ in range(batches)
+            ))):
+                rows += batch
+    logs = _solve_sparse(rows, q)
+
+    # h * g^k = u / v with the logs of all factors known
+    product = math.prod(factor_base)
+    root = math.isqrt(p) + 1
+    for _ in range(1 << 20):
+        k = random.randrange(p - 1)
+        relation = _relation(h * pow(g, k, p) % p, p, root, factor_base, product)
+        if relation is not None and all(c in logs for c in relation):
+            return (sum(e * logs[c] for c, e in relation.items()) - k) % q
+    raise ValueError('no smooth relation for h')
+
+
+def subgroup_log(h: int, g: int, p: int, q: int, workers: int = None) -> int:
+    """log_g h for g of prime order q."""
+    if q < BSGS_LIMIT:
+        x = bsgs(h, g, p, q)
+        if x is None:
+            raise ValueError('h is not in the subgroup generated by g')
+        return x
+    if q < RHO_LIMIT:
+        return pollard_rho(h, g, p, q, workers)
+    return index_calculus(h, g, p, q, workers=workers)
+
+
+def _project(x: int, p: int, parts: list[int]) -> list[int]:
+    # [x^(prod(parts) / part) for part in parts] with a product tree: every
+    # level costs about one exponentiation by prod(parts), not one per part
+    if len(parts) == 1:
+        return [x]
+    half = len(parts) // 2
+    left, right = parts[:half], parts[half:]
+    return _project(pow(x, math.prod(right), p), p, left) + _project(pow(x, math.prod(left), p), p, right)
+
+def _prime_power_log(h: int, g: int, p: int, q: int, f: int, workers: int = None) -> int:
+    # log_g h for g of order q^f, one base-q digit at a time
+    gamma = pow(g, q ** (f - 1), p)
+    x = 0
+    for i in range(f):
+        d = pow(h * pow(g, -x, p) % p, q ** (f - 1 - i), p)
+        x += subgroup_log(d, gamma, p, q, workers) * q ** i
+    return x
+
+def pohlig_hellman(h: int, g: int, p: int, factors: dict[int, int], workers: int = None) -> tuple[int, int]:
+    """x mod m with g^x = h mod p in the subgroup of order m = prod q^e (a divisor of p - 1).
+
+    With the full factorization of p - 1 this is log_g h mod the order of g,
+    with a partial one it is the log modulo the factored part of that order.
+    Subgroups of order PARALLEL_SUBGROUP and above are solved in parallel.
+    """
+    workers = workers or default_workers()
+    n = math.prod(q ** e for q, e in factors.items())
+    g, h = pow(g, (p - 1) // n, p), pow(h, (p - 1) // n, p)
+    parts = [q ** e for q, e in factors.items()]
+
+    # (q, f, g_q, h_q) with g_q of order q^f, the q-part of the order of g
+    subgroups = []
+    for (q, e), g_q, h_q in zip(factors.items(), _project(g, p, parts), _project(h, p, parts)):
+        f, x = 0, g_q
+        while x != 1:
+            x = pow(x, q, p)
+            f += 1
+        if f:
+            subgroups.append((q, f, g_q, h_q))
+
+    heavy = [s for s in subgroups if s[0] >= PARALLEL_SUBGROUP]
+    logs = {}
+    if workers > 1 and len(heavy) > 1:
+        with ProcessPoolExecutor(min(workers, len(heavy))) as pool:
+            futures = {q: pool.submit(_prime_power_log, h_q, g_q, p, q, f, 1) for q, f, g_q, h_q in heavy}
+            for q, f, g_q, h_q in subgroups:
+                if q not in futures:
+                    logs[q] = _prime_power_log(h_q, g_q, p, q, f, 1)
+            for q, future in futures.items():
+                logs[q] = future.result()
+    else:
+        for q, f, g_q, h_q in subgroups:
+            logs[q] = _prime_power_log(h_q, g_q, p, q, f, workers)
+    return crt([logs[q] for q, _, _, _ in subgroups], [q ** f for q, f, _, _ in subgroups])
+
+
+class PartialLog(NamedTuple):
+    residue: int
+    modulus: int
+    # bit length of the part of p - 1 that was not factored, an upper bound
+    # on the part of the order of g the log is unknown for
+    unknown_bits: int
+
+
+def smooth_log(h: int, g: int, p: int, primes=None, solve_cofactor: bool = False, workers: int = None) -> PartialLog:
+    """log_g h modulo the part of the order of g that trial division of p - 1 by `primes` factors.
+
+    With solve_cofactor a prime cofactor is solved as well, e.g. q of a safe
+    prime 2q + 1; a composite one is left unknown.
+    """
+    factors, cofactor = factor_smooth(p - 1, primes)
+    if solve_cofactor and cofactor > 1 and is_probable_prime(cofactor):
+        factors[cofactor] = factors.get(cofactor, 0) + 1
+        cofactor = 1
+    x, m = pohlig_hellman(h, g, p, factors, workers)
+    return PartialLog(x, m, cofactor.bit_length() if cofactor > 1 else 0)
@@ -0,0 +1,58 @@
+"""Linear algebra over GF(p) for small p, vectorized with NumPy int64."""
+
+
+import numpy as np
+
+
+def _check_size(p: int, n: int):
+    # a reduction step sums n products of two residues
+    if (p - 1) ** 2 * (n + 1) >= 1 << 63:
+        raise ValueError(f'GF({p}) with {n} unknowns overflows int64')
+
+
+class System:
+    """Linear equations over GF(p) added one at a time, kept in reduced row echelon form.
+
+    Every added equation is reduced against the pivot rows, so the rank is
+    known after each one and dependent equations are dropped right away.
+    """
+
+    def __init__(self, n: int, p: int):
+        _check_size(p, n)
+        self.n = n
+        self.p = p
+        # augmented pivot rows, pivot entries are 1 and the only non-zero in their column
+        self._rows = np.zeros((n, n + 1), dtype=np.int64)
+        self._pivots = np.zeros(n, dtype=np.int64)
+        self.rank = 0
+
+    @property
+    def full(self) -> bool:
+        return self.rank == self.n
+
+    def add(self, coefficients, value: int) -> bool:
+        """Add sum(coefficients[i] * x_i) = value, return whether it raised the rank."""
+        row = np.append(np.asarray(coefficients, dtype=np.int64) % self.p, value % self.p)
+        rows, pivots = self._rows[:self.rank], self._pivots[:self.rank]
+        row = (row - row[pivots] @ rows) % self.p
+        nonzero = np.flatnonzero(row[:self.n])
+        if not nonzero.size:
+            if row[self.n]:
+                raise ValueError('inconsistent equation')
+            return False
+        c = nonzero[0]
+        row = row * pow(int(row[c]), -1, self.p) % self.p
+        rows -= np.outer(rows[:, c], row)
+        rows %= self.p
+        self._rows[self.rank] = row
+        self._pivots[self.rank] = c
+        self.rank += 1
+        return True
+
+    def solution(self) -> np.ndarray:
+        if not self.full:
+            raise ValueError(f'rank {self.rank} of {self.n}')
+        x = np.empty(self.n, dtype=np.int64)
+        x[self._pivots] = self._rows[:, self.n]
+        return x
+
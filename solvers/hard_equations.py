@@ -0,0 +1,13 @@
+"""hard_equations: x_{i+1} = A x_i^6 + C mod p with A = a^17, C = ab + b^2.
+
+Two steps give A and C, the first output gives seed^6; cube roots are unique
+since 3 does not divide p - 1, the square root is one of two signs.
+"""
+
+
+from pathlib import Path
+from .lcg import recover
+
+
+def solve(public: Path) -> str:
+    return recover('hard_equations', (public / 'output.txt').read_text()).decode()
@@ -0,0 +1,132 @@
+"""State recovery for the generators of basic_ops and hard_equations.
+
+basic_ops:      x_{i+1} = a x_i + b mod p
+hard_equations: x_{i+1} = a^17 x_i^6 + ab + b^2 mod p, with 3 not dividing p - 1
+
+Both print ten outputs and then `p = ...`; the seed x_0 is the flag.
+
+    python -m solvers.lcg basic_ops --samples 100    # regenerate and solve 100 outputs
+    python -m solvers.lcg hard_equations out1.txt out2.txt
+"""
+
+
+import argparse
+import contextlib
+import io
+import random
+import runpy
+import sys
+import time
+import types
+from pathlib import Path
+from .ntheory import is_flag, to_bytes
+from .roots import sqrt_mod_all
+
+TASKS_DIR = Path(__file__).resolve().absolute().parent.parent / 'tasks'
+
+
+def parse_output(text: str) -> tuple[list[int], int]:
+    """The outputs, one per line, then `p = ...`."""
+    *values, p = [line for line in text.splitlines() if line.strip()]
+    return [int(v) for v in values], int(p.strip().removeprefix('p = '))
+
+
+def affine_params(x: list[int], p: int) -> tuple[int, int]:
+    """a and b of x_{i+1} = a x_i + b from three consecutive outputs."""
+    a = (x[2] - x[1]) * pow(x[1] - x[0], -1, p) % p
+    return a, (x[1] - a * x[0]) % p
+
+def affine_seed(x: list[int], p: int) -> int:
+    a, b = affine_params(x, p)
+    return (x[0] - b) * pow(a, -1, p) % p
+
+
+def sextic_params(x: list[int], p: int) -> tuple[int, int]:
+    """A = a^17 and C = ab + b^2 of x_{i+1} = A x_i^6 + C, linear in two steps."""
+    s0, s1 = pow(x[0], 6, p), pow(x[1], 6, p)
+    A = (x[2] - x[1]) * pow(s1 - s0, -1, p) % p
+    return A, (x[1] - A * s0) % p
+
+
+def sextic_seeds(x: list[int], p: int) -> list[int]:
+    """Both x_0 with x_1 = A x_0^6 + C: the cube root of x_0^6 is unique, its square roots are +-x_0."""
+    A, C = sextic_params(x, p)
+    sixth = (x[0] - C) * pow(A, -1, p) % p
+    square = pow(sixth, pow(3, -1, p - 1), p)
+    return sqrt_mod_all(square, {p: 1})
+
+
+def recover(task: str, text: str) -> bytes:
+    """The flag behind one output.txt of `task`."""
+    x, p = parse_output(text)
+    seeds = [affine_seed(x, p)] if task == 'basic_ops' else sextic_seeds(x, p)
+    for seed in seeds:
+        if is_flag(to_bytes(seed)):
+            return to_bytes(seed)
+    raise ValueError('no seed decodes as a flag')
+
+
+def generate(task: str, flag: bytes) -> str:
+    """Run the task's src/task.py with `flag` and return what it prints."""
+    src = next(TASKS_DIR.glob(f'*/*/{task}/src/task.py'))
+    module = types.ModuleType('flag')
+    module.FLAG = flag
+    saved = sys.modules.get('flag')
+    sys.modules['flag'] = module
+    out = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(out):
+            runpy.run_path(str(src), run_name='__main__')
+    finally:
+        if saved is None:
+            sys.modules.pop('flag')
+        else:
+            sys.modules['flag'] = saved
+    return out.getvalue()
+
+
+def random_flag() -> bytes:
+    return b'flag{%032x}' % random.getrandbits(128)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m solvers.lcg', description=__doc__.split('\n\n')[0])
+    parser.add_argument('task', choices=['basic_ops', 'hard_equations'])
+    parser.add_argument('outputs', nargs='*', type=Path, help='output.txt files to solve')
+    parser.add_argument('--samples', type=int, default=0, help='outputs to regenerate with random flags and solve')
+    args = parser.parse_args()
+
+    failed = solved = 0
+    generating = solving = 0.0
+    for path in args.outputs:
+        try:
+            print(f'{path}: {recover(args.task, path.read_text()).decode()}')
+            solved += 1
+        except ValueError as e:
+            print(f'{path}: {e}')
+            failed += 1
+    for _ in range(args.samples):
+        flag = random_flag()
+        started = time.perf_counter()
+        text = generate(args.task, flag)
+        generating += time.perf_counter() - started
+        started = time.perf_counter()
+        try:
+            ok = recover(args.task, text) == flag
+        except ValueError:
+            ok = False
+        solving += time.perf_counter() - started
+        solved += ok
+        failed += not ok
+        if not ok:
+            print(f'not recovered: {flag.decode()}')
+    if args.samples:
+        print(f'{args.samples} samples: {generating / args.samples * 1000:.1f} ms to generate, '
+              f'{solving / args.samples * 1000:.2f} ms to solve on average')
+    print(f'{solved} solved, {failed} failed')
+    if failed:
+        exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Number theory helpers shared by the solvers."""
+
+
+import math
+import random
+from functools import lru_cache
+
+
+def sieve(limit: int) -> list[int]:
+    """All primes below `limit`."""
+    is_prime = bytearray([1]) * limit
+    is_prime[:2] = b'\x00\x00'
+    for i in range(2, math.isqrt(limit - 1) + 1):
+        if is_prime[i]:
+            is_prime[i * i::i] = bytes(len(range(i * i, limit, i)))
+    return [i for i, flag in enumerate(is_prime) if flag]
+
+
+@lru_cache(maxsize=None)
+def prime_table(count: int = 10000) -> tuple[int, ...]:
+    """The first `count` primes, the table the smooth task primes are built from."""
+    limit = 15
+    if count >= 6:
+        limit = int(count * (math.log(count) + math.log(math.log(count)))) + 1
+    return tuple(sieve(limit)[:count])
+
+
+def factor_smooth(n: int, primes=None) -> tuple[dict[int, int], int]:
+    """Trial divide `n` by `primes`, return the factors found and the cofactor."""
+    factors = {}
+    for q in primes or prime_table():
+        if n % q == 0:
+            e = 0
+            while n % q == 0:
+                n //= q
+                e += 1
+            factors[q] = e
+            if n == 1:
+                break
+    return factors, n
+
+
+def is_probable_prime(n: int, rounds: int = 32) -> bool:
+    """Miller-Rabin, with the first 12 primes as bases (deterministic below 3.1e23) plus random ones."""
+    if n < 2:
+        return False
+    small = prime_table(12)
+    for q in small:
+        if n % q == 0:
+            return n == q
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    bases = list(small) + [random.randrange(2, n - 1) for _ in range(rounds if n >> 78 else 0)]
+    for a in bases:
+        x = pow(a, d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def crt(residues: list[int], moduli: list[int]) -> tuple[int, int]:
+    """Combine x = r_i mod m_i into x mod lcm(m_i), moduli need not be coprime."""
+    x, m = 0, 1
+    for r, n in zip(residues, moduli):
+        g = math.gcd(m, n)
+        if (r - x) % g:
+            raise ValueError('inconsistent congruences')
+        l = m // g * n
+        x = (x + m * ((r - x) // g * pow(m // g, -1, n // g) % (n // g))) % l
+        m = l
+    return x, m
+
+
+def to_bytes(x: int) -> bytes:
+    return x.to_bytes((x.bit_length() + 7) // 8, 'big')
+
+
+def is_flag(data: bytes) -> bool:
+    return data.startswith(b'flag{') and data.endswith(b'}')
@@ -0,0 +1,14 @@
+"""pohlig_hellman: p - 1 = 2 * q_1 * ... * q_k with small q_i, so the log splits into small subgroups."""
+
+
+from .dlog import smooth_log
+
+
+def solve(connect) -> str:
+    with connect() as r:
+        p, g, public = r.recvint('p'), r.recvint('g'), r.recvint('public')
+        x, _, unknown_bits = smooth_log(public, g, p)
+        if unknown_bits:
+            raise ValueError(f'p - 1 is not smooth, {unknown_bits} bits left')
+        r.sendline(x)
+        return r.recvflag()
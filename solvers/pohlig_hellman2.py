@@ -0,0 +1,24 @@
+"""pohlig_hellman2: every connection leaks the flag modulo the smooth part of a fresh p - 1.
+
+The residues of many connections are combined with the CRT until the
+result decodes as a flag.
+"""
+
+
+from .dlog import smooth_log
+from .ntheory import crt, is_flag, to_bytes
+
+MAX_CONNECTIONS = 200
+
+
+def solve(connect) -> str:
+    x, m = 0, 1
+    for _ in range(MAX_CONNECTIONS):
+        with connect() as r:
+            p = r.recvint('p')
+            h = r.recvint()
+        residue, modulus, _ = smooth_log(h, 2, p)
+        x, m = crt([x, residue], [m, modulus])
+        if is_flag(to_bytes(x)):
+            return to_bytes(x).decode()
+    raise ValueError(f'no flag after {MAX_CONNECTIONS} connections, {m.bit_length()} bits known')
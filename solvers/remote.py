@@ -0,0 +1,56 @@
+"""Line-based connection to a netcat-style task."""
+
+
+import re
+import socket
+
+
+class Remote:
+    def __init__(self, host: str, port: int, timeout: float = 60.0):
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._file = self._sock.makefile('rwb')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+    def recvline(self) -> str:
+        line = self._file.readline()
+        if not line:
+            raise EOFError('connection closed by the service')
+        return line.decode().rstrip('\n')
+
+    def recvuntil(self, separator: str) -> str:
+        data = b''
+        while not data.endswith(separator.encode()):
+            byte = self._file.read(1)
+            if not byte:
+                raise EOFError('connection closed by the service')
+            data += byte
+        return data.decode()
+
+    def recvint(self, name: str = None) -> int:
+        """Read a `name = 123` line, or a bare number when name is None."""
+        line = self.recvline()
+        match = re.fullmatch(rf'{re.escape(name)} = (-?\d+)' if name else r'(-?\d+)', line.strip())
+        if match is None:
+            raise ValueError(f'expected {name or "a number"}, got {line[:40]!r}')
+        return int(match.group(1))
+
+    def recvflag(self) -> str:
+        """Read a line and return the flag in it, the tasks print it as bytes."""
+        line = self.recvline()
+        match = re.search(r'flag\{[^}]*\}', line)
+        if match is None:
+            raise ValueError(f'expected the flag, got {line[:40]!r}')
+        return match.group()
+
+    def sendline(self, *values):
+        self._file.write(''.join(f'{v}\n' for v in values).encode())
+        self._file.flush()
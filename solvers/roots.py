@@ -0,0 +1,189 @@
+"""Modular square roots.
+
+jacobi() decides residuosity with quadratic reciprocity, several times
+cheaper than Euler's criterion at 1024 bits, so non-squares are rejected
+before any exponentiation. sqrt_mod() picks the cheapest method for p:
+one exponentiation for p = 3 mod 4 (Lagrange) and p = 5 mod 8 (Atkin),
+Tonelli-Shanks while the 2-adic part of p - 1 is small, Cipolla above.
+sqrt_mod_all() lifts roots to prime powers and enumerates all of them mod
+n with the CRT.
+
+`python -m solvers.roots` benchmarks them on 1024-bit primes.
+"""
+
+
+import random
+from functools import lru_cache
+from itertools import product
+from .ntheory import crt, is_probable_prime
+
+# Tonelli-Shanks costs one exponentiation plus about s^2 / 2 squarings,
+# Cipolla an exponentiation in GF(p^2) stepped through in Python; for
+# 1024-bit p they break even around s = 125 (python -m solvers.roots)
+CIPOLLA_THRESHOLD = 128
+
+
+def jacobi(a: int, n: int) -> int:
+    """Jacobi symbol (a / n) for odd n > 0, the Legendre symbol for prime n."""
+    a %= n
+    result = 1
+    while a:
+        twos = (a & -a).bit_length() - 1
+        a >>= twos
+        if twos & 1 and n & 7 in (3, 5):
+            result = -result
+        if a & 3 == 3 and n & 3 == 3:
+            result = -result
+        a, n = n % a, a
+    return result if n == 1 else 0
+
+
+def is_square(a: int, p: int) -> bool:
+    """Whether a is a square mod the odd prime p, 0 included."""
+    return jacobi(a, p) != -1
+
+
+def _two_adic(n: int) -> tuple[int, int]:
+    # n = q * 2^s with q odd
+    s = (n & -n).bit_length() - 1
+    return n >> s, s
+
+@lru_cache(maxsize=64)
+def _shanks_setup(p: int) -> tuple[int, int, int]:
+    # q, s and z^q for the smallest non-square z; cached as the tasks ask for
+    # many roots mod the same p
+    q, s = _two_adic(p - 1)
+    z = 2
+    while jacobi(z, p) != -1:
+        z += 1
+    return q, s, pow(z, q, p)
+
+
+def sqrt_3mod4(a: int, p: int) -> int:
+    return pow(a, (p + 1) // 4, p)
+
+def sqrt_5mod8(a: int, p: int) -> int:
+    # Atkin
+    b = pow(2 * a, (p - 5) // 8, p)
+    i = 2 * a * b * b % p
+    return a * b * (i - 1) % p
+
+def tonelli_shanks(a: int, p: int) -> int:
+    q, s, c = _shanks_setup(p)
+    # r = a^((q + 1) / 2) and t = a^q = r^2 / a from one exponentiation
+    r = pow(a, (q + 1) // 2, p)
+    t = r * r * pow(a, -1, p) % p
+    m = s
+    while t != 1:
+        i, t2 = 0, t
+        while t2 != 1:
+            t2 = t2 * t2 % p
+            i += 1
+        b = pow(c, 1 << (m - i - 1), p)
+        m, c = i, b * b % p
+        t, r = t * c % p, r * b % p
+    return r
+
+def cipolla(a: int, p: int) -> int:
+    # (t + sqrt(w))^((p + 1) / 2) in GF(p^2), where w = t^2 - a is a non-square
+    t = 0
+    while jacobi(t * t - a, p) != -1:
+        t = random.randrange(p)
+    w = (t * t - a) % p
+    x, y = 1, 0
+    bx, by = t, 1
+    e = (p + 1) // 2
+    while e:
+        if e & 1:
+            x, y = (x * bx + y * by % p * w) % p, (x * by + y * bx) % p
+        bx, by = (bx * bx + by * by % p * w) % p, 2 * bx * by % p
+        e >>= 1
+    return x
+
+
+def sqrt_mod(a: int, p: int) -> int:
+    """A square root of a mod the odd prime p, ValueError for a non-square."""
+    a %= p
+    if a == 0:
+        return 0
+    if jacobi(a, p) != 1:
+        raise ValueError(f'{a} is not a square mod {p}')
+    if p & 3 == 3:
+        return sqrt_3mod4(a, p)
+    if p & 7 == 5:
+        return sqrt_5mod8(a, p)
+    if _two_adic(p - 1)[1] < CIPOLLA_THRESHOLD:
+        return tonelli_shanks(a, p)
+    return cipolla(a, p)
+
+
+def sqrt_mod_prime_power(a: int, p: int, e: int) -> list[int]:
+    """All square roots of a mod p^e for an odd prime p and a coprime to p."""
+    r = sqrt_mod(a, p)
+    pe = p
+    for _ in range(e - 1):
+        # Hensel: r <- r - (r^2 - a) / (2r) mod p^(k + 1)
+        pe *= p
+        r = (r - (r * r - a) * pow(2 * r, -1, pe)) % pe
+    return sorted({r, pe - r})
+
+
+def sqrt_mod_all(a: int, factors: dict[int, int]) -> list[int]:
+    """All square roots of a mod n = prod p^e over odd primes p not dividing a.
+
+    Empty if a is not a square modulo one of the p; the Jacobi symbols are
+    checked before any root is taken.
+    """
+    if any(jacobi(a, p) != 1 for p in factors):
+        return []
+    moduli = [p ** e for p, e in factors.items()]
+    per_prime = [sqrt_mod_prime_power(a % m, p, e) for (p, e), m in zip(factors.items(), moduli)]
+    return sorted(crt(list(roots), moduli)[0] for roots in product(*per_prime))
+
+
+def _random_prime(bits: int, residue: int = 1, modulus: int = 2) -> int:
+    # p = residue mod modulus
+    while True:
+        p = random.getrandbits(bits) | 1 << (bits - 1)
+        p += (residue - p) % modulus
+        if p.bit_length() == bits and is_probable_prime(p):
+            return p
+
+def benchmark(bits: int = 1024, count: int = 50):
+    import time
+
+    def timed(f, *args) -> float:
+        started = time.perf_counter()
+        for _ in range(count):
+            f(*args)
+        return (time.perf_counter() - started) / count * 1e6
+
+    primes = {
+        'p = 3 mod 4': _random_prime(bits, 3, 4),
+        'p = 5 mod 8': _random_prime(bits, 5, 8),
+        'p = 1 mod 2^8': _random_prime(bits, 1 + (1 << 8), 1 << 9),
+        'p = 1 mod 2^64': _random_prime(bits, 1 + (1 << 64), 1 << 65),
+        'p = 1 mod 2^256': _random_prime(bits, 1 + (1 << 256), 1 << 257),
+        'p = 1 mod 2^512': _random_prime(bits, 1 + (1 << 512), 1 << 513),
+    }
+    print(f'{bits}-bit moduli, microseconds per call')
+    for name, p in primes.items():
+        a = pow(random.randrange(2, p), 2, p)
+        row = {
+            'jacobi': timed(jacobi, a, p),
+            'euler': timed(pow, a, (p - 1) // 2, p),
+            'sqrt_mod': timed(sqrt_mod, a, p),
+            'tonelli_shanks': timed(tonelli_shanks, a, p),
+            'cipolla': timed(cipolla, a, p),
+        }
+        print(f'  {name:<16}', '  '.join(f'{k} {v:8.0f}' for k, v in row.items()))
+
+    p, q = primes['p = 3 mod 4'], primes['p = 1 mod 2^8']
+    a = pow(random.randrange(2, p * q), 2, p * q)
+    print(f'  all 4 roots mod a {2 * bits}-bit n = pq: {timed(sqrt_mod_all, a, {p: 1, q: 1}):.0f}')
+    non_square = next(x for x in range(2, 1000) if jacobi(x, p) == -1)
+    print(f'  rejecting a non-square mod n = pq: {timed(sqrt_mod_all, non_square, {p: 1, q: 1}):.0f}')
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,21 @@
+"""square_roots: answer the first random number that is a square mod both p and q."""
+
+
+from .roots import sqrt_mod_all
+
+MAX_ROUNDS = 1000
+
+
+def solve(connect) -> str:
+    with connect() as r:
+        n, p, q = r.recvint('n'), r.recvint('p'), r.recvint('q')
+        for _ in range(MAX_ROUNDS):
+            a = r.recvint('random_number')
+            # three in four numbers are rejected by the Jacobi symbols alone
+            roots = sqrt_mod_all(a, {p: 1, q: 1})
+            if roots:
+                r.sendline(roots[0])
+                return r.recvflag()
+            r.sendline(0)
+            r.recvline()
+    raise ValueError(f'no square in {MAX_ROUNDS} rounds')
@@ -1,20 +1,13 @@
 # secret value that you don't know
 from flag import FLAG
-from random import randint
-from Crypto.Util.number import getPrime, isPrime
+from instances import InstancePool
 
-def generate_secure_prime(bits: int) -> int:
-    while True:
-        p = getPrime(bits)
-        if isPrime(p * 2 + 1):
-            return 2*p + 1
+# 2q + 1 for 64-bit prime q
+instances = InstancePool("safe", 64)
 
-p = generate_secure_prime(64)
 def main():
+    p, g, secret, public = instances.take()
     print(f"{p = }")
-    secret = randint(1, p - 1)
-    g = 2 
-    public = pow(g, secret, p)
     print(f"{g = }")
     print(f"{public = }")
     a = int(input())
@@ -23,4 +16,5 @@ def main():
     else:
         print("Try again")
 
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
\ No newline at end of file
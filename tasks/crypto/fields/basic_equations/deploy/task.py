@@ -20,4 +20,5 @@ def main():
         if b == 1:
             exit()
 
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,111 @@
+# persistent TCP server for the crypto tasks
+#
+# Replaces `socat TCP-LISTEN:1337,fork EXEC:python3 /app/task.py`: the task
+# module is imported once, then its main() runs for every connection on a
+# bounded pool of threads. Inside a session sys.stdin / sys.stdout are the
+# connection, so print() and input() in task.py work as they did under socat,
+# and exit() only ends that session.
+#
+# usage: python3 server.py [MODULE], MODULE defaults to task
+# env: PORT (1337), MAX_SESSIONS (64), SESSION_TIMEOUT seconds (300),
+#      MAX_LINE characters (65536)
+import importlib
+import os
+import socket
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+PORT = int(os.environ.get("PORT", "1337"))
+MAX_SESSIONS = int(os.environ.get("MAX_SESSIONS", "64"))
+SESSION_TIMEOUT = float(os.environ.get("SESSION_TIMEOUT", "300"))
+MAX_LINE = int(os.environ.get("MAX_LINE", "65536"))
+# seconds to wait after a failed accept(), e.g. out of file descriptors
+ACCEPT_BACKOFF = 0.1
+
+_session = threading.local()
+
+
+class LineTooLong(Exception):
+    pass
+
+
+class LineReader:
+    # all sessions share one process, so one connection sending megabytes
+    # without a newline must not grow it towards mem_limit: lines are read
+    # at most MAX_LINE characters at a time and a longer one ends the session
+    def __init__(self, stream):
+        self._stream = stream
+
+    def readline(self, size: int = -1) -> str:
+        line = self._stream.readline(MAX_LINE if size < 0 else min(size, MAX_LINE))
+        if len(line) >= MAX_LINE and not line.endswith("\n"):
+            raise LineTooLong(f"line longer than {MAX_LINE} characters")
+        return line
+
+    def __getattr__(self, attr):
+        return getattr(self._stream, attr)
+
+
+class SessionStream:
+    # forwards to the stream of the session running in the current thread
+    def __init__(self, name: str, default):
+        self._name = name
+        self._default = default
+
+    def __getattr__(self, attr):
+        return getattr(getattr(_session, self._name, None) or self._default, attr)
+
+
+def run_session(main, conn: socket.socket):
+    conn.settimeout(SESSION_TIMEOUT)
+    _session.stdin = LineReader(conn.makefile("r", encoding="utf-8", errors="replace"))
+    _session.stdout = conn.makefile("w", encoding="utf-8", buffering=1)
+    try:
+        main()
+    except SystemExit:
+        pass
+    except (EOFError, OSError, LineTooLong):
+        # player disconnected, timed out or sent an overlong line
+        pass
+    except Exception:
+        # same as an uncaught exception under socat: the connection is closed
+        traceback.print_exc(file=sys.__stderr__)
+    finally:
+        try:
+            _session.stdout.flush()
+        except OSError:
+            pass
+        _session.stdin.close()
+        _session.stdout.close()
+        _session.stdin = _session.stdout = None
+        conn.close()
+
+
+def serve(module_name: str = "task"):
+    main = importlib.import_module(module_name).main
+    sys.stdin = SessionStream("stdin", sys.stdin)
+    sys.stdout = SessionStream("stdout", sys.stdout)
+
+    slots = threading.BoundedSemaphore(MAX_SESSIONS)
+    with socket.create_server(("0.0.0.0", PORT), backlog=128) as server, \
+            ThreadPoolExecutor(MAX_SESSIONS, thread_name_prefix="session") as pool:
+        print(f"serving {module_name}.main on port {PORT}", file=sys.__stderr__, flush=True)
+        while True:
+            # connections over MAX_SESSIONS wait in the listen backlog
+            slots.acquire()
+            try:
+                conn, _ = server.accept()
+            except OSError as e:
+                # EMFILE, ECONNABORTED and the like pass, the service must not die of them
+                slots.release()
+                print(f"accept failed: {e}", file=sys.__stderr__, flush=True)
+                time.sleep(ACCEPT_BACKOFF)
+                continue
+            pool.submit(run_session, main, conn).add_done_callback(lambda _: slots.release())
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1] if len(sys.argv) > 1 else "task")
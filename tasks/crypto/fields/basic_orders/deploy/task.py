@@ -1,17 +1,13 @@
 # secret value that you don't know
 from flag import FLAG
-from random import randint
-from Crypto.Util.number import getPrime
+from instances import InstancePool
 
-p = getPrime(1024)
-
-# group generator (hopefully)
-g = 2 
-
-server_secret = randint(1, p - 1)
-server_public = pow(g, server_secret, p)
+# group generator (hopefully) g = 2
+instances = InstancePool("prime", 1024, g=2)
 
 def main():
+    p, g, server_secret, server_public = instances.take()
+
     print(f"{p = }")
     print(f"{g = }")
     print(f"Prove your knowledge of the server's secret")
@@ -32,4 +28,5 @@ def main():
         print("Try again")
 
 
-main()
+if __name__ == "__main__":
+    main()
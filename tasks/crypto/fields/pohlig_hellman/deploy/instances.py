@@ -0,0 +1,47 @@
+# pool of ready-made challenge instances (p, g, secret, public) for the DLP tasks
+#
+# server.py keeps task.py loaded, so a pool created at import time lives for
+# all sessions: a background thread keeps INSTANCE_POOL_SIZE instances ready
+# and every session takes one of its own, which makes connecting cost the
+# same no matter how long generating p takes. Primes come from primes.take(),
+# an empty pool falls back to generating the instance right away.
+import os
+import queue
+import threading
+from random import randint
+from typing import NamedTuple
+from primes import take
+
+INSTANCE_POOL_SIZE = int(os.environ.get("INSTANCE_POOL_SIZE", "16"))
+
+
+class Instance(NamedTuple):
+    p: int
+    g: int
+    secret: int
+    public: int
+
+
+class InstancePool:
+    def __init__(self, shape: str, bits: int, g: int = 2, size: int = INSTANCE_POOL_SIZE):
+        self.shape = shape
+        self.bits = bits
+        self.g = g
+        self._ready = queue.Queue(size)
+        threading.Thread(target=self._refill, name=f"instances-{shape}-{bits}", daemon=True).start()
+
+    def generate(self) -> Instance:
+        p = take(self.shape, self.bits)
+        secret = randint(1, p - 1)
+        return Instance(p, self.g, secret, pow(self.g, secret, p))
+
+    def _refill(self):
+        while True:
+            # blocks while the pool is full
+            self._ready.put(self.generate())
+
+    def take(self) -> Instance:
+        try:
+            return self._ready.get_nowait()
+        except queue.Empty:
+            return self.generate()
@@ -0,0 +1,60 @@
+# smooth primes p = 2 * q_1 * ... * q_k + 1 with q_i among the first TABLE_SIZE primes
+#
+# The prime table comes from a bytearray sieve and is cached for the life of
+# the process, so it is built once per server / pool worker, not per session.
+# Candidates are built iteratively: a random base is grown to just under the
+# target size, then completed with one last factor at a time. Every candidate
+# is trial divided by the small primes (via gcd with their product, using the
+# base reduced once) before the expensive primality test.
+import math
+from functools import lru_cache
+from random import choice, sample
+from Crypto.Util.number import isPrime
+
+TABLE_SIZE = 10000
+# trial division by the primes below this bound
+TRIAL_BOUND = 2000
+# last factors tried for a base before a fresh base is drawn
+TAILS_PER_BASE = 256
+
+
+def sieve(limit: int) -> list[int]:
+    # all primes < limit
+    is_prime = bytearray([1]) * limit
+    is_prime[:2] = b"\x00\x00"
+    for i in range(2, math.isqrt(limit - 1) + 1):
+        if is_prime[i]:
+            is_prime[i * i::i] = bytes(len(range(i * i, limit, i)))
+    return [i for i, flag in enumerate(is_prime) if flag]
+
+@lru_cache(maxsize=None)
+def prime_table(count: int = TABLE_SIZE) -> tuple[int, ...]:
+    # first `count` primes; p_n < n (ln n + ln ln n) for n >= 6
+    limit = 15
+    if count >= 6:
+        limit = int(count * (math.log(count) + math.log(math.log(count)))) + 1
+    return tuple(sieve(limit)[:count])
+
+@lru_cache(maxsize=None)
+def _trial_modulus(bound: int = TRIAL_BOUND) -> int:
+    return math.prod(sieve(bound))
+
+
+def smooth_prime(bits: int, table_size: int = TABLE_SIZE) -> int:
+    table = prime_table(table_size)
+    tail_bits = table[-1].bit_length()
+    modulus = _trial_modulus()
+    while True:
+        base = 1
+        while base.bit_length() < bits - tail_bits:
+            base *= choice(table)
+        base_residue = 2 * base % modulus
+        for q in sample(table, min(TAILS_PER_BASE, len(table))):
+            if (base * q).bit_length() < bits:
+                continue
+            # 2 * base * q + 1 has no prime factor below TRIAL_BOUND
+            if math.gcd(base_residue * q + 1, modulus) != 1:
+                continue
+            p = 2 * base * q + 1
+            if isPrime(p):
+                return p
@@ -1,29 +1,13 @@
 # secret value that you don't know
 from flag import FLAG
-from random import randint
-from sympy import nextprime
-from Crypto.Util.number import isPrime
-from random import choice
+from instances import InstancePool
 
-sieve = [2]
-while len(sieve) < 10000:
-    sieve.append(nextprime(sieve[-1]))
-
-def generate_smooth_prime(bits: int) -> int:
-    accumulator = 1
-    while accumulator.bit_length() < bits: 
-        accumulator *= choice(sieve)
-    if isPrime(2 * accumulator + 1):
-        return 2 * accumulator + 1
-    return generate_smooth_prime(bits)
-
-p = generate_smooth_prime(1024)
+# 2 * q_1 * ... * q_k + 1 with q_i among the first 10000 primes
+instances = InstancePool("smooth", 1024)
 
 def main():
+    p, g, secret, public = instances.take()
     print(f"{p = }")
-    secret = randint(1, p - 1)
-    g = 2 
-    public = pow(g, secret, p)
     print(f"{g = }")
     print(f"{public = }")
     a = int(input())
@@ -32,4 +16,5 @@ def main():
     else:
         print("Try again")
 
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
\ No newline at end of file
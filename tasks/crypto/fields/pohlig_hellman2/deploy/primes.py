@@ -0,0 +1,133 @@
+# pool of pre-generated primes, so players don't wait for a prime search on connect
+#
+# `python3 primes.py keep safe:64` runs next to the service and keeps
+# PRIME_POOL_SIZE primes of every given shape in PRIME_POOL_DIR, one per line.
+# task.py calls take(shape, bits): every prime is handed out only once and
+# an empty pool falls back to generating the prime right away.
+import fcntl
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from Crypto.Util.number import getPrime, getStrongPrime, isPrime
+
+POOL_DIR = Path(os.environ.get("PRIME_POOL_DIR", Path(tempfile.gettempdir()) / "prime_pool"))
+POOL_SIZE = int(os.environ.get("PRIME_POOL_SIZE", "16"))
+
+
+def safe_prime(bits: int) -> int:
+    # p = 2q + 1 with q prime of `bits` bits
+    while True:
+        q = getPrime(bits)
+        if isPrime(2 * q + 1):
+            return 2 * q + 1
+
+def strong_prime_3mod4(bits: int) -> int:
+    while True:
+        p = getStrongPrime(bits)
+        if p % 4 == 3:
+            return p
+
+def prime_3mod4(bits: int) -> int:
+    while True:
+        p = getPrime(bits)
+        if p % 4 == 3:
+            return p
+
+def prime_not_1mod3(bits: int) -> int:
+    # 3 does not divide p - 1, so cube roots mod p are unique
+    while True:
+        p = getPrime(bits)
+        if (p - 1) % 3 != 0:
+            return p
+
+def smooth_prime(bits: int) -> int:
+    # p = 2 * q_1 * ... * q_k + 1 with q_i among the first 10000 primes,
+    # smooth.py ships only with the tasks that use this shape
+    from smooth import smooth_prime
+    return smooth_prime(bits)
+
+SHAPES = {
+    "prime": getPrime,
+    "safe": safe_prime,
+    "strong": getStrongPrime,
+    "strong_3mod4": strong_prime_3mod4,
+    "3mod4": prime_3mod4,
+    "not_1mod3": prime_not_1mod3,
+    "smooth": smooth_prime,
+}
+
+
+class _Pool:
+    def __init__(self, shape: str, bits: int):
+        if shape not in SHAPES:
+            raise ValueError(f"unknown prime shape {shape}")
+        self.shape = shape
+        self.bits = bits
+        self.path = POOL_DIR / f"{shape}-{bits}.txt"
+
+    def __enter__(self):
+        POOL_DIR.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a+")
+        fcntl.flock(self._file, fcntl.LOCK_EX)
+        self._file.seek(0)
+        return self
+
+    def __exit__(self, *exc):
+        self._file.close()
+
+    def read(self) -> list[int]:
+        return [int(line) for line in self._file.read().split()]
+
+    def write(self, primes: list[int]):
+        self._file.seek(0)
+        self._file.truncate()
+        self._file.write("".join(f"{p}\n" for p in primes))
+
+    def generate(self) -> int:
+        return SHAPES[self.shape](self.bits)
+
+
+def take(shape: str, bits: int) -> int:
+    with _Pool(shape, bits) as pool:
+        primes = pool.read()
+        if primes:
+            p = primes.pop()
+            pool.write(primes)
+            return p
+    return pool.generate()
+
+def size(shape: str, bits: int) -> int:
+    with _Pool(shape, bits) as pool:
+        return len(pool.read())
+
+def fill(shape: str, bits: int, count: int = POOL_SIZE):
+    pool = _Pool(shape, bits)
+    while size(shape, bits) < count:
+        # generate outside of the lock, take() must not wait for it
+        p = pool.generate()
+        with pool:
+            pool.write(pool.read() + [p])
+
+def keep(specs: list[tuple[str, int]], interval: float = 1.0):
+    while True:
+        for shape, bits in specs:
+            fill(shape, bits)
+        time.sleep(interval)
+
+
+def parse_spec(spec: str) -> tuple[str, int]:
+    shape, bits = spec.split(":")
+    return shape, int(bits)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ("fill", "keep"):
+        print(f"usage: {sys.argv[0]} fill|keep SHAPE:BITS ...  (shapes: {', '.join(SHAPES)})")
+        exit(1)
+    specs = [parse_spec(spec) for spec in sys.argv[2:]]
+    if sys.argv[1] == "fill":
+        for shape, bits in specs:
+            fill(shape, bits)
+    else:
+        keep(specs)
@@ -1,13 +1,15 @@
 # secret value that you don't know
 from flag import FLAG
 from random import randint
-from Crypto.Util.number import getPrime, bytes_to_long
+from Crypto.Util.number import bytes_to_long
+from primes import take
 
 SECRET = bytes_to_long(FLAG)
-p = getPrime(1024)
 
 def main():
+    p = take("prime", 1024)
     print(f"{p = }")
     print(pow(2, SECRET, p))
 
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,12 +1,12 @@
 # secret value that you don't know
 from flag import FLAG
 from random import randint
-from Crypto.Util.number import getStrongPrime
+from primes import take
 
-p = getStrongPrime(1024)
-q = getStrongPrime(1024)
-n = p * q
 def main():
+    p = take("strong", 1024)
+    q = take("strong", 1024)
+    n = p * q
     print(f"{n = }")
     print(f"{p = }")
     print(f"{q = }")
@@ -1,7 +1,7 @@
 # app.py
-from flask import Flask, g, render_template, request, redirect, url_for, session, flash
-import sqlite3
-from werkzeug.security import check_password_hash, generate_password_hash
+from flask import Flask, render_template, request, redirect, url_for, session, flash
+import sqlite_pool
+from passwords import hash_password, check_password
 import os
 
 APP_SECRET = os.environ.get("FLASK_SECRET", "af1bf09c49ed9fde1a881a56d73ce4c7")
@@ -10,19 +10,8 @@ DB_PATH = os.environ.get("IDOR_DB", "idor_task.db")
 app = Flask(__name__)
 app.secret_key = APP_SECRET
 
-def get_db():
-    db = getattr(g, "_db", None)
-    if db is None:
-        db = sqlite3.connect(DB_PATH)
-        db.row_factory = sqlite3.Row
-        g._db = db
-    return db
-
-@app.teardown_appcontext
-def close_db(exc):
-    db = getattr(g, "_db", None)
-    if db is not None:
-        db.close()
+db_pool = sqlite_pool.init_app(app, DB_PATH)
+get_db = db_pool.get_db
 
 # ---- Public ----
 @app.route("/")
@@ -45,7 +34,7 @@ def register():
     try:
         cur = db.execute(
             "INSERT INTO users (username, password_hash) VALUES (?, ?);",
-            (username, generate_password_hash(password))
+            (username, hash_password(password))
         )
         db.commit()
         user_id = cur.lastrowid  # id нового пользователя
@@ -81,7 +70,7 @@ def login():
     db = get_db()
     cur = db.execute("SELECT id, username, password_hash FROM users WHERE username = ?;", (username,))
     row = cur.fetchone()
-    if not row or not check_password_hash(row["password_hash"], password):
+    if not row or not check_password(row["password_hash"], password):
         flash("Неверные учётные данные", "danger")
         return redirect(url_for("login"))
     # login ok
@@ -1,6 +1,6 @@
 # init_db.py
 import sqlite3
-from werkzeug.security import generate_password_hash
+from passwords import hash_password
 
 DB = "idor_task.db"
 
@@ -31,7 +31,8 @@ def init():
     users = []
     for i in range(1,11):
         uname = f"user{i}"
-        pwd_hash = generate_password_hash(f"Pass{i}!")  # simple passwords for tests
+        # user5 owns the flag document
+        pwd_hash = hash_password(f"Pass{i}!", guarded=i == 5)  # simple passwords for tests
         users.append((uname, pwd_hash))
     cur.executemany("INSERT INTO users (username, password_hash) VALUES (?, ?);", users)
 
@@ -0,0 +1,56 @@
+# password hashing policy for the Flask tasks
+#
+# Werkzeug's default scheme costs about 160 ms of CPU per hash (scrypt in
+# Werkzeug 3, 260000+ rounds of PBKDF2 before), paid on every /register and
+# /login and for every seed account at startup, which made hashing the
+# biggest CPU consumer of the containers. Accounts players register are
+# throwaway, so their hashes are made with PASSWORD_HASH_METHOD, by default
+# 1000 rounds of PBKDF2 (under 1 ms). Seed accounts whose data is the flag,
+# like predict_token's admin, are hashed with guarded=True and keep
+# PASSWORD_GUARD_METHOD, Werkzeug's default scheme unless set, so a leaked
+# database stays as hard to crack as before; there are only a few of them.
+# Verifying takes the method from the stored hash, so hashes made under
+# another method keep working. Successful checks are remembered in an LRU
+# cache of PASSWORD_CACHE_SIZE entries, keyed by the stored hash and an HMAC
+# of the password under a per-process key, so repeated logins skip the hash
+# and no password is kept in memory; failed checks are never cached.
+#
+# env: PASSWORD_HASH_METHOD (pbkdf2:sha256:1000), PASSWORD_GUARD_METHOD (Werkzeug's default),
+#      PASSWORD_CACHE_SIZE (1024), 0 disables the cache
+import hashlib
+import hmac
+import os
+import threading
+from collections import OrderedDict
+from werkzeug.security import check_password_hash, generate_password_hash
+
+PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "pbkdf2:sha256:1000")
+# empty means Werkzeug's default, which depends on its version
+PASSWORD_GUARD_METHOD = os.environ.get("PASSWORD_GUARD_METHOD", "")
+PASSWORD_CACHE_SIZE = int(os.environ.get("PASSWORD_CACHE_SIZE", "1024"))
+
+_cache_key = os.urandom(32)
+_verified = OrderedDict()
+_lock = threading.Lock()
+
+
+def hash_password(password: str, guarded: bool = False) -> str:
+    if guarded and not PASSWORD_GUARD_METHOD:
+        return generate_password_hash(password)
+    return generate_password_hash(password, method=PASSWORD_GUARD_METHOD if guarded else PASSWORD_HASH_METHOD)
+
+
+def check_password(pwhash: str, password: str) -> bool:
+    key = (pwhash, hmac.new(_cache_key, password.encode(), hashlib.sha256).digest())
+    with _lock:
+        if key in _verified:
+            _verified.move_to_end(key)
+            return True
+    if not check_password_hash(pwhash, password):
+        return False
+    if PASSWORD_CACHE_SIZE > 0:
+        with _lock:
+            _verified[key] = True
+            if len(_verified) > PASSWORD_CACHE_SIZE:
+                _verified.popitem(last=False)
+    return True
@@ -1,8 +1,8 @@
 # app.py
 import os
-import sqlite3
-from flask import Flask, g, render_template, request, redirect, url_for, session, flash, send_file, abort, Response
-from werkzeug.security import generate_password_hash, check_password_hash
+import sqlite_pool
+from flask import Flask, render_template, request, redirect, url_for, session, flash, send_file, abort, Response
+from passwords import hash_password, check_password
 from pathlib import Path
 
 BASE = Path(__file__).parent.resolve()
@@ -13,19 +13,8 @@ SECRET = BASE / "secret"     # directory outside uploads (contains flag)
 app = Flask(__name__)
 app.secret_key = os.environ.get("FLASK_SECRET", "dev-secret-change-me")
 
-def get_db():
-    db = getattr(g, "_db", None)
-    if db is None:
-        db = sqlite3.connect(DB_PATH)
-        db.row_factory = sqlite3.Row
-        g._db = db
-    return db
-
-@app.teardown_appcontext
-def close_db(exc):
-    db = getattr(g, "_db", None)
-    if db:
-        db.close()
+db_pool = sqlite_pool.init_app(app, DB_PATH)
+get_db = db_pool.get_db
 
 # ---- helpers ----
 def current_user():
@@ -91,7 +80,7 @@ def register():
     db = get_db()
     try:
         db.execute("INSERT INTO users (username, password_hash, display_name) VALUES (?, ?, ?);",
-                   (username, generate_password_hash(password), display))
+                   (username, hash_password(password), display))
         db.commit()
     except Exception as e:
         flash("Username already taken", "danger")
@@ -110,7 +99,7 @@ def login():
     password = request.form.get("password", "")
     db = get_db()
     row = db.execute("SELECT id, username, password_hash FROM users WHERE username = ?;", (username,)).fetchone()
-    if not row or not check_password_hash(row["password_hash"], password):
+    if not row or not check_password(row["password_hash"], password):
         flash("Invalid credentials", "danger")
         return redirect(url_for("login"))
     session["user_id"] = row["id"]
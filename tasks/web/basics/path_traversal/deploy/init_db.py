@@ -1,7 +1,7 @@
 # init_data.py
 import os
 import sqlite3
-from werkzeug.security import generate_password_hash
+from passwords import hash_password
 
 BASE = os.path.dirname(__file__)
 DB = os.path.join(BASE, "fileshare.db")
@@ -23,9 +23,9 @@ def init_db():
     );
     """)
     users = [
-        ("alice", generate_password_hash("Alice123!"), "Alice A."),
-        ("bob", generate_password_hash("Bob123!"), "Robert B."),
-        ("carol", generate_password_hash("Carol123!"), "Carol C."),
+        ("alice", hash_password("Alice123!"), "Alice A."),
+        ("bob", hash_password("Bob123!"), "Robert B."),
+        ("carol", hash_password("Carol123!"), "Carol C."),
     ]
     cur.executemany("INSERT INTO users (username, password_hash, display_name) VALUES (?, ?, ?);", users)
     conn.commit()
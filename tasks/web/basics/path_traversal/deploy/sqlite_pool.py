@@ -0,0 +1,80 @@
+# per-process pool of SQLite connections for the Flask tasks
+#
+# Opening the database on every request costs a connect, re-reading the
+# schema and re-preparing every statement. The pool keeps connections open
+# across requests instead, so each one keeps its prepared statement cache,
+# and puts the database in WAL mode with synchronous=NORMAL: readers no
+# longer wait for a writer and a commit does not fsync, which is what capped
+# concurrent registrations. A request takes a connection in get_db() and the
+# teardown registered by init_app() rolls back whatever it left open and
+# hands it back; when every pooled connection is busy a new one is opened
+# and closed again on release.
+#
+# env: DB_POOL_SIZE (8), DB_STATEMENT_CACHE (256), DB_BUSY_TIMEOUT seconds (5)
+import os
+import queue
+import sqlite3
+from contextlib import contextmanager
+from flask import g
+
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "8"))
+DB_STATEMENT_CACHE = int(os.environ.get("DB_STATEMENT_CACHE", "256"))
+DB_BUSY_TIMEOUT = float(os.environ.get("DB_BUSY_TIMEOUT", "5"))
+
+
+class ConnectionPool:
+    def __init__(self, path, size: int = DB_POOL_SIZE):
+        self.path = str(path)
+        # LIFO keeps the most recently used connections, and their caches, warm
+        self._idle = queue.LifoQueue(size)
+
+    def connect(self) -> sqlite3.Connection:
+        # connections move between request threads, one thread at a time
+        conn = sqlite3.connect(self.path, timeout=DB_BUSY_TIMEOUT,
+                               cached_statements=DB_STATEMENT_CACHE, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute("PRAGMA synchronous=NORMAL;")
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self.connect()
+
+    def release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            # e.g. an INSERT that failed on UNIQUE, closing used to discard it
+            conn.rollback()
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def get_db(self) -> sqlite3.Connection:
+        # the connection of the current request
+        db = getattr(g, "_db", None)
+        if db is None:
+            db = g._db = self.acquire()
+        return db
+
+
+def init_app(app, path, size: int = DB_POOL_SIZE) -> ConnectionPool:
+    pool = ConnectionPool(path, size)
+
+    @app.teardown_appcontext
+    def release_db(exc):
+        db = g.pop("_db", None)
+        if db is not None:
+            pool.release(db)
+
+    return pool
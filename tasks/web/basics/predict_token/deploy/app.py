@@ -1,9 +1,9 @@
 # app.py
 import os
-import sqlite3
+import sqlite_pool
 import base64
-from flask import Flask, g, render_template, request, jsonify, redirect, url_for
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Flask, render_template, request, jsonify, redirect, url_for
+from passwords import hash_password, check_password
 
 DB_PATH = os.environ.get("SITE_DB", "site.db")
 APP_SECRET = os.environ.get("FLASK_SECRET", "dev-secret-change-me")
@@ -11,19 +11,8 @@ APP_SECRET = os.environ.get("FLASK_SECRET", "dev-secret-change-me")
 app = Flask(__name__)
 app.secret_key = APP_SECRET
 
-def get_db():
-    db = getattr(g, "_db", None)
-    if db is None:
-        db = sqlite3.connect(DB_PATH)
-        db.row_factory = sqlite3.Row
-        g._db = db
-    return db
-
-@app.teardown_appcontext
-def close_db(exc):
-    db = getattr(g, "_db", None)
-    if db:
-        db.close()
+db_pool = sqlite_pool.init_app(app, DB_PATH)
+get_db = db_pool.get_db
 
 # Utility: generate token (intentionally simple / predictable)
 # Two supported formats:
@@ -70,7 +59,7 @@ def register():
     db = get_db()
     try:
         cur = db.execute("INSERT INTO users (username, password_hash, display_name) VALUES (?, ?, ?);",
-                         (username, generate_password_hash(password), display))
+                         (username, hash_password(password), display))
         db.commit()
         uid = cur.lastrowid
         token = make_token(username, uid)
@@ -90,7 +79,7 @@ def login():
     db = get_db()
     cur = db.execute("SELECT id, username, password_hash FROM users WHERE username = ?;", (username,))
     row = cur.fetchone()
-    if not row or not check_password_hash(row["password_hash"], password):
+    if not row or not check_password(row["password_hash"], password):
         return jsonify(success=False, error="invalid credentials"), 401
     # Issue token on login
     token = make_token(row["username"], row["id"])
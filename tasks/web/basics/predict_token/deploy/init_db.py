@@ -1,6 +1,6 @@
 # init_db.py
 import sqlite3
-from werkzeug.security import generate_password_hash
+from passwords import hash_password
 
 DB = "site.db"
 
@@ -28,10 +28,11 @@ def init():
 
     # create some users (admin is first)
     users = [
-        ("admin", generate_password_hash("AdminPass!"), "Site Administrator"),
-        ("alice", generate_password_hash("Alice123!"), "Alice"),
-        ("bob", generate_password_hash("Bob123!"), "Bob"),
-        ("carol", generate_password_hash("Carol123!"), "Carol")
+        # the admin's secret is the flag
+        ("admin", hash_password("AdminPass!", guarded=True), "Site Administrator"),
+        ("alice", hash_password("Alice123!"), "Alice"),
+        ("bob", hash_password("Bob123!"), "Bob"),
+        ("carol", hash_password("Carol123!"), "Carol")
     ]
     cur.executemany("INSERT INTO users (username, password_hash, display_name) VALUES (?, ?, ?);", users)
 
@@ -98,7 +98,7 @@ def init_db():
     ])
 
     FLAG = "flag{sql_injection_2025_easy_c1b885c48db640258ac9452035019121}"
-    cur.execute("INSERT INTO items (title, description) VALUES (you_will_never_guess_this_ed6b0a9bb5f7f0f2a1253da34e32e156, ?);", (FLAG,))
+    cur.execute("INSERT INTO items (title, description) VALUES (?, ?);", ("you_will_never_guess_this_ed6b0a9bb5f7f0f2a1253da34e32e156", FLAG))
     db.commit()
     db.close()
 
@@ -128,7 +128,9 @@ def search():
         print("SQL Error:", e)
     return render_template_string(TEMPLATE, q=q, rows=rows)
 
+# ---- Init DB on startup ----
+init_db()
+
 if __name__ == "__main__":
-    init_db()
     app.run(debug=True, host="127.0.0.1", port=5000)
 
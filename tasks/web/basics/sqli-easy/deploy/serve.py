@@ -0,0 +1,53 @@
+# production WSGI server for the Flask tasks
+#
+# Replaces `app.run(debug=True)`: the Werkzeug dev server handles everything
+# in one process, and has the reloader and the interactive debugger on, so
+# one slow request or one scanner stalls the task for every player. Here the
+# app runs under gunicorn with WEB_WORKERS processes of WEB_THREADS threads
+# each. The module is imported once in the master before the workers fork
+# (preload), so anything it sets up at import time, like creating the
+# database, happens once and the workers share the same secret key and
+# data. Connection pools are opened lazily, inside each worker.
+#
+# usage: python3 serve.py [MODULE[:APP]], defaults to app:app
+# env: PORT (5000), WEB_WORKERS (2), WEB_THREADS (8), WEB_TIMEOUT seconds (30),
+#      WEB_BACKLOG (128)
+import importlib
+import os
+import sys
+from gunicorn.app.base import BaseApplication
+
+PORT = int(os.environ.get("PORT", "5000"))
+WEB_WORKERS = int(os.environ.get("WEB_WORKERS", "2"))
+WEB_THREADS = int(os.environ.get("WEB_THREADS", "8"))
+WEB_TIMEOUT = int(os.environ.get("WEB_TIMEOUT", "30"))
+WEB_BACKLOG = int(os.environ.get("WEB_BACKLOG", "128"))
+
+
+class Server(BaseApplication):
+    def __init__(self, target: str):
+        self.target = target
+        super().__init__()
+
+    def load_config(self):
+        options = {
+            "bind": f"0.0.0.0:{PORT}",
+            "workers": WEB_WORKERS,
+            "threads": WEB_THREADS,
+            "worker_class": "gthread",
+            "timeout": WEB_TIMEOUT,
+            "backlog": WEB_BACKLOG,
+            "preload_app": True,
+            # the dev server logged every request too
+            "accesslog": "-",
+        }
+        for key, value in options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        module, _, name = self.target.partition(":")
+        return getattr(importlib.import_module(module), name or "app")
+
+
+if __name__ == "__main__":
+    Server(sys.argv[1] if len(sys.argv) > 1 else "app").run()
@@ -1,7 +1,8 @@
 # app.py
 from flask import Flask, request, render_template, redirect, url_for, session, jsonify
 import pymysql
-from werkzeug.security import generate_password_hash, check_password_hash
+import mysql_pool
+from passwords import hash_password, check_password
 import os
 
 app = Flask(__name__)
@@ -9,8 +10,7 @@ app.secret_key = os.environ.get("FLASK_SECRET", "dev-secret-change-me")
 
 DB_CFG = dict(host="db", port=3306, user="root", password="root", db="sqli_accounts", charset="utf8mb4", cursorclass=pymysql.cursors.Cursor, autocommit=True)
 
-def get_conn():
-    return pymysql.connect(**DB_CFG)
+db_pool = mysql_pool.ConnectionPool(DB_CFG)
 
 # ---- Routes ----
 
@@ -35,25 +35,21 @@ def register():
         return jsonify(success=False, error="Username and password required"), 400
 
     # Хешируем пароль (даже если SQL инъекцию мы допускаем — пароль хранится как hash)
-    password_hash = generate_password_hash(password)
+    password_hash = hash_password(password)
 
-    conn = None
     try:
-        conn = get_conn()
-        cur = conn.cursor()
-        # ВНИМАННО: уязвимый код — прямая строковая подстановка.
-        # Кто-то может вставить payload, который вызовет ошибку и в тексте ошибки будет например значение из таблицы secrets.
-        sql = f"INSERT INTO users (username, password_hash) VALUES ('{username}', '{password_hash}');"
-        cur.execute(sql)
+        with db_pool.connection() as conn:
+            cur = conn.cursor()
+            # ВНИМАННО: уязвимый код — прямая строковая подстановка.
+            # Кто-то может вставить payload, который вызовет ошибку и в тексте ошибки будет например значение из таблицы secrets.
+            sql = f"INSERT INTO users (username, password_hash) VALUES ('{username}', '{password_hash}');"
+            cur.execute(sql)
         # Если дошли сюда — запрос выполнен успешно
         return jsonify(success=True)
     except Exception as e:
         # Возвращаем текст SQL-ошибки — для учебной error-based инъекции это критично
         # Необходимо аккуратно формировать JSON ответ
         return jsonify(success=False, error=str(e)), 400
-    finally:
-        if conn:
-            conn.close()
 
 # Login — безопасно: параметризованный запрос + проверка хеша
 @app.route("/login", methods=["GET", "POST"])
@@ -67,25 +63,21 @@ def login():
     if not username or not password:
         return render_template("login.html", error="Введите логин и пароль")
 
-    conn = None
     try:
-        conn = get_conn()
-        cur = conn.cursor()
-        cur.execute("SELECT id, username, password_hash FROM users WHERE username = %s", (username,))
-        row = cur.fetchone()
+        with db_pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT id, username, password_hash FROM users WHERE username = %s", (username,))
+            row = cur.fetchone()
         if not row:
             return render_template("login.html", error="Неверные учётные данные")
         user_id, user_name, pwd_hash = row
-        if not check_password_hash(pwd_hash, password):
+        if not check_password(pwd_hash, password):
             return render_template("login.html", error="Неверные учётные данные")
         # Успешный вход
         session["user"] = {"id": user_id, "username": user_name}
         return redirect(url_for("dashboard"))
     except Exception as e:
         return render_template("login.html", error="Internal error")
-    finally:
-        if conn:
-            conn.close()
 
 @app.route("/logout")
 def logout():
@@ -36,8 +36,8 @@ FLAG = "FLAG{error_based_account_2025}"
 cur.execute("INSERT INTO secrets (id, name, secret) VALUES (1, 'admin', %s);", (FLAG,))
 
 # Для удобства создадим тестового пользователя: user / password: P@ssw0rd
-from werkzeug.security import generate_password_hash
-pwd_hash = generate_password_hash("P@ssw0rd")
+from passwords import hash_password
+pwd_hash = hash_password("P@ssw0rd")
 cur.execute("INSERT INTO users (username, password_hash) VALUES (%s, %s);", ("testuser", pwd_hash))
 
 print("DB initialized:", DB)
@@ -0,0 +1,86 @@
+# bounded pool of PyMySQL connections for sqli-error
+#
+# Connecting per request costs a TCP handshake and MySQL authentication, and
+# players brute-forcing /register opened connections faster than MySQL gave
+# its slots back. The pool never holds more than DB_POOL_SIZE connections per
+# process: connection() waits up to DB_POOL_TIMEOUT seconds for a free one
+# and raises PoolExhausted after that. A connection that sat idle for more
+# than DB_PING_INTERVAL seconds is pinged before reuse and reconnected if the
+# server dropped it; one that broke during a query is discarded on release
+# and replaced by a fresh connect. Errors raised by the query itself pass
+# through unchanged, so the MySQL error text still reaches the response.
+#
+# env: DB_POOL_SIZE (8), DB_POOL_TIMEOUT seconds (5), DB_PING_INTERVAL seconds (30)
+import collections
+import os
+import threading
+import time
+from contextlib import contextmanager
+import pymysql
+
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "8"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "5"))
+DB_PING_INTERVAL = float(os.environ.get("DB_PING_INTERVAL", "30"))
+
+
+class PoolExhausted(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, config: dict, size: int = DB_POOL_SIZE, timeout: float = DB_POOL_TIMEOUT):
+        self.config = config
+        self.size = size
+        self.timeout = timeout
+        # one slot per connection, idle or checked out
+        self._slots = threading.BoundedSemaphore(size)
+        # (connection, time it was released), most recently used last
+        self._idle = collections.deque()
+
+    def connect(self):
+        return pymysql.connect(**self.config)
+
+    def _checkout(self):
+        try:
+            conn, released = self._idle.pop()
+        except IndexError:
+            return self.connect()
+        if time.monotonic() - released > DB_PING_INTERVAL:
+            try:
+                conn.ping(reconnect=True)
+            except pymysql.MySQLError:
+                self._discard(conn)
+                return self.connect()
+        return conn
+
+    def acquire(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolExhausted(f"all {self.size} database connections are busy")
+        try:
+            return self._checkout()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn):
+        # PyMySQL drops the socket when the connection itself fails
+        if conn.open:
+            self._idle.append((conn, time.monotonic()))
+        else:
+            self._discard(conn)
+        self._slots.release()
+
+    @staticmethod
+    def _discard(conn):
+        try:
+            conn.close()
+        except pymysql.MySQLError:
+            pass
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
@@ -137,7 +137,9 @@ def search():
         print("SQL Error:", e)
     return render_template_string(TEMPLATE, q=q, rows=rows)
 
+# ---- Init DB on startup ----
+init_db()
+
 if __name__ == "__main__":
-    init_db()
     app.run(debug=True, host="127.0.0.1", port=5000)
 
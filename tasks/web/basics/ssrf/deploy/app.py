@@ -1,7 +1,7 @@
 from flask import Flask, request, render_template, redirect, url_for, session, flash
-from werkzeug.security import generate_password_hash, check_password_hash
-import sqlite3
-import requests
+from passwords import hash_password, check_password
+import sqlite_pool
+from fetcher import Fetcher
 from pathlib import Path
 
 BASE = Path(__file__).parent.resolve()
@@ -10,14 +10,14 @@ DB_PATH = BASE / "ssrf_demo.db"
 app = Flask(__name__)
 app.secret_key = "3718b545b81cc41cb863bf6b97c695a8"
 
+fetcher = Fetcher()
+
 # ---- DB helpers ----
-def get_db():
-    db = sqlite3.connect(DB_PATH)
-    db.row_factory = sqlite3.Row
-    return db
+db_pool = sqlite_pool.init_app(app, DB_PATH)
+get_db = db_pool.get_db
 
 def init_db():
-    conn = get_db()
+    conn = db_pool.connect()
     cur = conn.cursor()
     cur.executescript("""
     DROP TABLE IF EXISTS users;
@@ -29,9 +29,9 @@ def init_db():
     );
     """)
     users = [
-        ("alice", generate_password_hash("Alice123!"), "Alice A."),
-        ("bob", generate_password_hash("Bob123!"), "Bob B."),
-        ("carol", generate_password_hash("Carol123!"), "Carol C."),
+        ("alice", hash_password("Alice123!"), "Alice A."),
+        ("bob", hash_password("Bob123!"), "Bob B."),
+        ("carol", hash_password("Carol123!"), "Carol C."),
     ]
     cur.executemany("INSERT INTO users (username,password_hash,display_name) VALUES (?,?,?);", users)
     conn.commit()
@@ -44,7 +44,6 @@ def current_user():
         return None
     db = get_db()
     user = db.execute("SELECT id, username, display_name FROM users WHERE id=?;", (uid,)).fetchone()
-    db.close()
     return user
 
 # ---- Routes ----
@@ -66,14 +65,12 @@ def register():
     db = get_db()
     try:
         db.execute("INSERT INTO users(username,password_hash,display_name) VALUES(?,?,?)",
-                   (username,generate_password_hash(password),display))
+                   (username,hash_password(password),display))
         db.commit()
     except:
         flash("Username taken","danger")
-        db.close()
         return redirect(url_for("register"))
     row = db.execute("SELECT id FROM users WHERE username=?",(username,)).fetchone()
-    db.close()
     session["user_id"]=row["id"]
     flash("Registered and logged in","success")
     return redirect(url_for("dashboard"))
@@ -86,8 +83,7 @@ def login():
     password = request.form.get("password","")
     db = get_db()
     row = db.execute("SELECT id,password_hash FROM users WHERE username=?",(username,)).fetchone()
-    db.close()
-    if not row or not check_password_hash(row["password_hash"], password):
+    if not row or not check_password(row["password_hash"], password):
         flash("Invalid credentials","danger")
         return redirect(url_for("login"))
     session["user_id"]=row["id"]
@@ -111,8 +107,7 @@ def dashboard():
         url_input = request.form.get("url","")
         try:
             # ---- SSRF vulnerable request ----
-            resp = requests.get(url_input, timeout=3)
-            fetched_content = resp.text[:2000]  # limit to 2k chars
+            fetched_content = fetcher.fetch(url_input, limit=2000)  # limit to 2k chars
         except Exception as e:
             fetched_content = f"Error fetching URL: {e}"
     return render_template("dashboard.html", user=user, fetched_content=fetched_content, url_input=url_input)
@@ -0,0 +1,74 @@
+# URL fetcher behind the ssrf dashboard
+#
+# requests.get(url, timeout=3) downloaded the whole body to keep 2000
+# characters of it, and the timeout only bounds each read, so a server
+# dripping a byte every few seconds held a request thread indefinitely. Here
+# the body is streamed and the connection dropped as soon as enough of it
+# arrived, and a fetch runs on a small per-worker thread pool: at most
+# FETCH_CONCURRENCY at once, a request waits FETCH_TIMEOUT seconds for a
+# free slot and gives up on the fetch after FETCH_DEADLINE seconds in total.
+# Fetches share one session, so connections to the same host (e.g. the app
+# itself on 127.0.0.1) are reused; its cookie jar accepts nothing, so one
+# player's fetches never send cookies set by another's.
+#
+# needs urllib3 >= 2.1 for HTTPResponse.read1()
+# env: FETCH_CONCURRENCY (8), FETCH_TIMEOUT seconds (3), FETCH_DEADLINE seconds (5)
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from http.cookiejar import DefaultCookiePolicy
+import requests
+from requests.adapters import HTTPAdapter
+
+FETCH_CONCURRENCY = int(os.environ.get("FETCH_CONCURRENCY", "8"))
+FETCH_TIMEOUT = float(os.environ.get("FETCH_TIMEOUT", "3"))
+FETCH_DEADLINE = float(os.environ.get("FETCH_DEADLINE", "5"))
+
+# longest UTF-8 encoding of a character
+MAX_CHAR_BYTES = 4
+
+
+class FetchError(Exception):
+    pass
+
+
+class Fetcher:
+    def __init__(self, concurrency: int = FETCH_CONCURRENCY):
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._pool = ThreadPoolExecutor(concurrency, thread_name_prefix="fetch")
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+    def _get(self, url: str, limit: int, deadline: float) -> str:
+        body = bytearray()
+        with self.session.get(url, stream=True, timeout=FETCH_TIMEOUT) as resp:
+            while len(body) < limit * MAX_CHAR_BYTES and time.monotonic() < deadline:
+                # returns whatever has arrived, where iter_content() waits for
+                # a full chunk however slowly it trickles in
+                chunk = resp.raw.read1(1024, decode_content=True)
+                if not chunk:
+                    break
+                body += chunk
+            encoding = resp.encoding or "utf-8"
+        return body.decode(encoding, errors="replace")[:limit]
+
+    def fetch(self, url: str, limit: int) -> str:
+        """The first `limit` characters of the body at `url`."""
+        if not self._slots.acquire(timeout=FETCH_TIMEOUT):
+            raise FetchError("too many fetches in progress, try again later")
+        deadline = time.monotonic() + FETCH_DEADLINE
+        try:
+            future = self._pool.submit(self._get, url, limit, deadline)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=FETCH_DEADLINE)
+        except TimeoutError:
+            # the pool thread stops at its next read, the slot stays taken until then
+            raise FetchError(f"fetch took longer than {FETCH_DEADLINE:g} seconds") from None